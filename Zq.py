@@ -22,6 +22,9 @@
 
 try:
     from Zq_c import push_zeros, push_zeros_looped, neighbors_connected_components
+    from Zq_c import Zq_bitset_native, Zq_layer_native, Zq_all_native, Zq_native_rules
+    from Zq_c import GraphWorkspace
+    from result_store import get_result_store
 except ImportError:
     # assume everything is in the global space
     # this happens when, for example, someone "load"s the right files
@@ -39,41 +42,123 @@ def subsets(s,r=None):
 
 
 from sage.all import Bitset,FrozenBitset
+class ZeroForcingSets(object):
+    """
+    The zero forcing sets of a graph, without listing them.
+
+    A set is zero forcing if pushing zeros from it fills every
+    vertex, so whether a set is in the family is found from its
+    closure, and the family takes no more memory than the graph.  Sets
+    can also be added to the family with :meth:`add`;
+    :func:`Z_pythonBitsetold` adds the sets from which it shows that
+    the `Z_q` game is won.  The minimal zero forcing sets are
+    generated lazily by :meth:`minimal`.
+
+    :param neighbors: (list of FrozenBitsets) -- the neighbors of each
+        vertex, with the vertices `0, \\ldots, n-1`
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import ZeroForcingSets
+        sage: P = graphs.PathGraph(4)
+        sage: L = ZeroForcingSets([FrozenBitset(P.neighbors(i), capacity=4) for i in range(4)])
+        sage: [1, 2] in L, [1] in L
+        (True, False)
+        sage: [sorted(S) for S in L.minimal()]
+        [[0], [3], [1, 2]]
+        sage: L.add([1])
+        sage: [1] in L
+        True
+    """
+    def __init__(self, neighbors):
+        self.neighbors = list(neighbors)
+        self.n = len(self.neighbors)
+        self.V = FrozenBitset(range(self.n), capacity=self.n)
+        # the masks of the sets added with add()
+        self.added = set()
+
+    def __repr__(self):
+        return "Zero forcing sets of a graph on %s vertices"%self.n
+
+    def _bitset(self, W):
+        return FrozenBitset(list(W), capacity=self.n)
+
+    def is_zero_forcing(self, W):
+        """
+        Return True if pushing zeros from ``W`` fills every vertex.
+        """
+        return push_zeros(self.neighbors, subgraph=self.V, filled_set=self._bitset(W),
+                          return_bitset=True) == self.V
+
+    def __contains__(self, W):
+        return _bitset_mask(W) in self.added or self.is_zero_forcing(W)
+
+    def add(self, W):
+        """
+        Add the set ``W`` to the family.
+        """
+        self.added.add(_bitset_mask(W))
+
+    def copy(self):
+        """
+        Return a copy of the family, so that sets can be added to one
+        without changing the other.
+        """
+        L = ZeroForcingSets(self.neighbors)
+        L.added = set(self.added)
+        return L
+
+    def minimal(self):
+        """
+        Generate the minimal zero forcing sets, as FrozenBitsets, by
+        increasing size.
+
+        A zero forcing set is minimal if no set with one vertex less
+        is zero forcing, so only the current set is kept in memory.
+        The sets added with :meth:`add` are not considered.
+        """
+        V = range(self.n)
+        smallest = None
+        for size in range(self.n+1):
+            for W in combinations(V, size):
+                if not self.is_zero_forcing(W):
+                    continue
+                if smallest is None:
+                    # the first zero forcing sets found are as small as
+                    # possible, so they are minimal
+                    smallest = size
+                elif size > smallest and any(self.is_zero_forcing(W[:i]+W[i+1:])
+                                             for i in range(size)):
+                    continue
+                yield self._bitset(W)
+
 def zero_forcing_sets(G=None,neighbors=None):
     """
     Calculate all zero forcing sets
 
-    Returns the zero forcing number, a minimal zero forcing set, and a
-    set of all zero forcing sets
+    Returns the zero forcing number, a minimum zero forcing set, and a
+    :class:`ZeroForcingSets` of all zero forcing sets.  The sets are
+    not listed, so this takes little memory even for large graphs.
+
+    :param G: a graph with vertices `0, \\ldots, n-1`, or None if
+        ``neighbors`` is given
+    :param neighbors: (list of FrozenBitsets) -- the neighbors of each
+        vertex
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import zero_forcing_sets
+        sage: Z, S, L = zero_forcing_sets(graphs.PetersenGraph())
+        sage: Z, len(S), S in L
+        (5, 5, True)
     """
     if neighbors is None:
         n=G.order()
-        neighbors=[Bitset(G.neighbors(i),capacity=n) for i in range(n)]
-    n=len(neighbors)
-    subgraph=Bitset(range(n),capacity=n)
-    V=set(range(n))
-    
-       
-    L=set(map(FrozenBitset,subsets(V,n)))
-    L|=set(map(FrozenBitset,subsets(V,n-1)))
-    zero_forcing_number=n-1
-    #print L
-    lastZ=set(list(V)[:-1])
-    debug=False
-    for sizeZ in range(n-2,-1,-1):
-        #if debug: print "Exploring size",sizeZ
-        for Z in subsets(V, sizeZ):
-            Z=FrozenBitset(Z,capacity=n)
-            
-            pushed, W=can_push(neighbors, subgraph, Z)
-            #if debug: print "W",W
-            if pushed and W in L:
-                #if debug: print "W in L"
-                L.add(Z)
-                lastZ=Z
-                zero_forcing_number=sizeZ
-        if zero_forcing_number>sizeZ: # we are done
-            return zero_forcing_number, lastZ, L
+        neighbors=[FrozenBitset(G.neighbors(i),capacity=n) for i in range(n)]
+    L=ZeroForcingSets(neighbors)
+    # the smallest sets come first
+    lastZ=next(L.minimal())
+    return len(lastZ), lastZ, L
 
 
 def Z_pythonBitsetold(G,q,zfs_sets=None):
@@ -129,7 +214,10 @@ def Z_pythonBitsetold(G,q,zfs_sets=None):
                         #if debug: print "Opponent hands back: ",K, "so we have vertices",new_vertices
                         # we don't have to do the empty subset, but it is simpler to just include it
                         
-                        pushed, X=can_push(neighbors, new_vertices, Z)
+                        X=push_zeros(neighbors, subgraph=new_vertices,
+                                     filled_set=Z, return_bitset=True)
+                        X=push_zeros(neighbors, subgraph=V,
+                                     filled_set=X, return_bitset=True)
                         #if debug: print "X, ZFS on opponent's return: ",X
                         if X not in L:
                             #if debug: print "X not in L"
@@ -205,13 +293,28 @@ def Zq_inertia_lower_bound(G, zero_forcing_function=None, verbose=False):
     (n-q-Z(G,q)-1,q) and (q,n-q-Z(G,q)-1)is not in the inertia set of G
     By the Southwest lemma, everything south and west of the point is not in the inertia
     
-    G is assumed to be connected
+    G is assumed to be connected.  If zero_forcing_function is None,
+    :func:`Zq_compute` is used when a result store is set or when G has
+    more than ``Zq_reachable_threshold`` vertices.  Otherwise the values
+    of q are computed with :func:`Zq_all`, ``Zq_all_block_size`` of them
+    at a time, so that the loop below can still stop early.
     """
-    global Zq_compute
-    if zero_forcing_function is None:
-        zero_forcing_function=Zq_compute
     G=G.relabel(inplace=False)
     n=G.order()
+    if zero_forcing_function is None:
+        if get_result_store() is not None or n > Zq_reachable_threshold:
+            zero_forcing_function=Zq_compute
+        else:
+            G_info=Zq_graph_info(G)
+            Zq_values={}
+            def zero_forcing_function(G,q):
+                if q not in Zq_values:
+                    start=0 if q==n else q
+                    block=range(start, min(start+Zq_all_block_size, n//2+1))
+                    if q==n:
+                        block.append(n)
+                    Zq_values.update(Zq_all(G_info, block))
+                return Zq_values[q]
     I = InertiaSet([(G.order(), G.order())])
     zero_forcing_number=zero_forcing_function(G,n)
     compute_Zq=True
@@ -252,6 +355,10 @@ def Zq_graph_info(G):
     Extract (and cache) necessary graph information for the Zq_bitset function.
 
     We've separated this out so that this busy work can be easily cached.
+
+    Returns ``(reverse_map, R, n, V, neighbors, workspace)``, where
+    ``workspace`` is a :class:`GraphWorkspace` of the relabeled graph,
+    or None if it has more than 63 vertices.
     """
     G=G.copy()
 
@@ -262,9 +369,131 @@ def Zq_graph_info(G):
     n=G.order()
     V=FrozenBitset(G.vertices(),capacity=n)
     neighbors=[FrozenBitset(G.neighbors(i),capacity=n) for i in range(n)]
-    return reverse_map, R, n, V, neighbors
+    if n<=63:
+        workspace=GraphWorkspace([_bitset_mask(N) for N in neighbors])
+    else:
+        workspace=None
+    return reverse_map, R, n, V, neighbors, workspace
+
+import numpy
+import tempfile
+import time
 
-def Zq_bitset(G,q, push_zeros, push_zeros_kwargs=dict(), return_track=False):
+# The value of an entry of a cost table that has not been computed
+ZQ_UNSET = 255
+# Cost tables with more entries than this are memory-mapped to a
+# temporary file instead of being kept in memory
+Zq_memmap_threshold = 2**27
+
+def Zq_cost_table(n, filename=None, shared=False, rows=None):
+    """
+    Make a cost table for :func:`Zq_bitset` on a graph with ``n``
+    vertices.
+
+    The table is a NumPy array of ``2^n`` unsigned bytes, indexed by
+    the integer whose bits are the vertices of a set, with every entry
+    ``ZQ_UNSET``.  A table with more than ``Zq_memmap_threshold``
+    entries is memory-mapped to a temporary file.
+
+    :param n: the number of vertices; at most 254
+    :param filename: if not None, memory-map the table to this file
+    :param shared: if True, put the table in memory shared with
+        processes forked later, as needed by the ``ncpus`` option of
+        :func:`Zq_bitset`.  Memory-mapped tables are always shared.
+    :param rows: if not None, make a two-dimensional table with this
+        many rows of ``2^n`` entries, as used by :func:`Zq_all`
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zq_cost_table
+        sage: t = Zq_cost_table(3); t
+        array([255, 255, 255, 255, 255, 255, 255, 255], dtype=uint8)
+    """
+    if n >= ZQ_UNSET:
+        raise ValueError("costs of a graph with %s vertices do not fit in a byte"%n)
+    size = 2**n
+    shape = (size,) if rows is None else (rows, size)
+    if filename is None and size*(rows or 1) > Zq_memmap_threshold:
+        filename = tempfile.TemporaryFile()
+    if filename is not None:
+        table = numpy.memmap(filename, dtype=numpy.uint8, mode='w+', shape=shape)
+    elif shared:
+        from multiprocessing.sharedctypes import RawArray
+        table = numpy.frombuffer(RawArray('B', size*(rows or 1)), dtype=numpy.uint8)
+        table.shape = shape
+    else:
+        table = numpy.empty(shape, dtype=numpy.uint8)
+    table.fill(ZQ_UNSET)
+    return table
+
+def _is_shared_table(table):
+    """
+    Return True if ``table`` was made by :func:`Zq_cost_table` in
+    memory shared with forked processes.
+    """
+    import ctypes
+    return (isinstance(table, numpy.memmap)
+            or isinstance(getattr(table, 'base', None), ctypes.Array))
+
+# The arguments of Zq_layer_native that are the same for every shard;
+# set before the worker processes are forked.
+_Zq_layer_args = None
+
+def _Zq_layer_worker(layer_shard):
+    """
+    Do one shard of one layer for :func:`_Zq_bitset_layers`.
+    """
+    sizeZ, shard, nshards = layer_shard
+    neighbor_masks, q, rule, looped_mask, unlooped_mask, address, keep_mask = _Zq_layer_args
+    Zq_layer_native(neighbor_masks, q, rule, looped_mask, unlooped_mask,
+                    address, sizeZ, shard, nshards, keep_mask)
+
+def _Zq_bitset_layers(neighbors, q, rule, looped, unlooped, cost, ncpus, keep_mask=0):
+    """
+    Run the native dynamic program of :func:`Zq_bitset` with ``ncpus``
+    processes.
+
+    The cost of a set only depends on the costs of larger sets, so the
+    sets of each size are split into ``ncpus`` shards that are done at
+    the same time, from the largest size down.  The processes are
+    forked after the table is made, so they write straight into the
+    shared table, which is found at the same address in each process.
+    The sets that meet ``keep_mask`` are skipped.
+    """
+    global _Zq_layer_args
+    import multiprocessing
+    n = len(neighbors)
+    looped_mask = _bitset_mask(looped) if looped is not None else 0
+    unlooped_mask = _bitset_mask(unlooped) if unlooped is not None else 0
+    _Zq_layer_args = ([_bitset_mask(N) for N in neighbors], q, rule,
+                      looped_mask, unlooped_mask, cost.ctypes.data, keep_mask)
+    pool = multiprocessing.Pool(ncpus)
+    try:
+        for sizeZ in range(n-1, -1, -1):
+            pool.map(_Zq_layer_worker, [(sizeZ, shard, ncpus) for shard in range(ncpus)])
+    finally:
+        pool.terminate()
+        pool.join()
+        _Zq_layer_args = None
+    V = FrozenBitset(range(n), capacity=n)
+    if rule == Zq_native_rules[push_zeros]:
+        start = push_zeros(neighbors, subgraph=V, filled_set=FrozenBitset([], capacity=n),
+                           return_bitset=True)
+    else:
+        start = push_zeros_looped(neighbors, subgraph=V, filled_set=FrozenBitset([], capacity=n),
+                                  looped=looped, unlooped=unlooped, return_bitset=True)
+    return int(cost[_bitset_mask(start)])
+
+def _bitset_mask(s):
+    """
+    Return the integer whose bits are the elements of ``s``.
+    """
+    mask = 0
+    for i in s:
+        mask |= 1 << i
+    return mask
+
+def Zq_bitset(G,q, push_zeros, push_zeros_kwargs=dict(), return_track=False, cost_table=None, ncpus=None, changed_vertex=None):
     """
     Calculate Zq, where you can have arbitrary color rules encoded in a push_zeros function.
 
@@ -274,91 +503,370 @@ def Zq_bitset(G,q, push_zeros, push_zeros_kwargs=dict(), return_track=False):
     :param push_zeros: a function with the signature ``push_zeros(neighbors, subgraph, filled_set, return_bitset=False, **kwargs)``, where the extra ``kwargs`` are another parameter.
     :param push_zeros_kwargs: extra arguments to the push_zeros function
     :param return_track: (bool) whether to return a sequence of actions that obtain the Zq value.
+        The moves along it are found again from the costs once they are
+        all computed, so this takes no more memory than the costs.
+    :param cost_table: a table from :func:`Zq_cost_table` with at least
+        ``2^n`` entries, so that one table can be used for many calls;
+        if None, a new table is made.  The costs of the sets are left
+        in the table, indexed by the integer whose bits are the set.
+
+    :param ncpus: if greater than 1, run the dynamic program in this
+        many forked processes, each doing a share of the sets of each
+        size.  The cost table must then be shared (see
+        :func:`Zq_cost_table`).  This only applies when the dynamic
+        program runs in C.
+
+    :param changed_vertex: a vertex, to start from the costs already in
+        ``cost_table``.  They must be the costs from a call with the
+        same graph, `q`, and rule, where only the loop status of this
+        vertex (looped, unlooped, or neither) was different.  Once a
+        vertex is filled, whether it has a loop no longer changes what
+        can be forced, so the costs of the sets containing the vertex
+        are the same, and only the other half of the table is
+        recomputed.
+
+    If ``push_zeros`` is ``push_zeros`` or ``push_zeros_looped`` from
+    ``Zq_c`` and the graph has at most 63 vertices, the dynamic
+    program runs in C (see :func:`Zq_bitset_native`) without the GIL.
+    Other color change rules run in Python.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zq_bitset, Zq_cost_table
+        sage: from sage.graphs.Zq_c import push_zeros
+        sage: table = Zq_cost_table(10)
+        sage: Zq_bitset(graphs.PetersenGraph(), 1, push_zeros=push_zeros, cost_table=table)
+        5
+        sage: Zq_bitset(graphs.CycleGraph(5), 1, push_zeros=push_zeros, cost_table=table)
+        2
+        sage: Zq_bitset(graphs.PetersenGraph(), 1, push_zeros=push_zeros, ncpus=2)
+        5
+        sage: value, trail = Zq_bitset(graphs.PathGraph(4), 0, push_zeros=push_zeros, return_track=True)
+        sage: value, len(trail.splitlines())
+        (1, 1)
+
+    Changing the loop status of one vertex::
+
+        sage: from sage.graphs.Zq import Zq_graph_info
+        sage: from sage.graphs.Zq_c import push_zeros_looped
+        sage: G = Zq_graph_info(graphs.PathGraph(4))
+        sage: table = Zq_cost_table(4)
+        sage: none = FrozenBitset([], capacity=4)
+        sage: Zq_bitset(G, 1, push_zeros_looped, dict(looped=none, unlooped=none), cost_table=table)
+        1
+        sage: end = FrozenBitset([0], capacity=4)
+        sage: Zq_bitset(G, 1, push_zeros_looped, dict(looped=end, unlooped=none), cost_table=table, changed_vertex=0)
+        1
     """
     # We aggressively cache the graph information
     if not isinstance(G, tuple):
         G = Zq_graph_info(G)
-    reverse_map, R, n, V, neighbors = G
+    reverse_map, R, n, V, neighbors, workspace = G
     # TODO: Why is this important?
     if n<2:
         raise ValueError("G needs to have 2 or more vertices")
-    cost={V: 0}
-    if return_track: 
-        track={V:'done'}
-    
-    #print L
-    debug=True
-    for sizeZ in range(n-1,-1,-1):
-        for Z in subsets(V, sizeZ):
-            Z=FrozenBitset(Z,capacity=n)
-            if push_zeros(neighbors, subgraph=V, filled_set=Z, return_bitset=False,
-                          **push_zeros_kwargs):
-                #print "can push, so skipping", Z
-                continue
-            b=n
-            c=n
-            cost[Z]=n
-            if return_track:
-                track[Z]='sentinal'
-            H=neighbors_connected_components(neighbors, V.difference(Z))
-            #if debug: print "H",H
-            #if debug: print "looping through subsets:",list(subsets(H,q+1))
-            for J in subsets(H,q+1):
-                #if debug: print "Hand to opponent: ",J
-                bb=-1
-                for K in subsets(J):
-                    if len(K)==0:
-                        continue # ignore the empty set
-                        
-                    subgraph=Bitset(Z,capacity=n)
-                    for s in K:
-                        subgraph.update(FrozenBitset(s))
-                    closed_Z=push_zeros(neighbors, subgraph=subgraph, 
-                                filled_set=Z, return_bitset=True, **push_zeros_kwargs)
-                    closed_Z=push_zeros(neighbors, subgraph=V, 
-                                filled_set=closed_Z, return_bitset=True, **push_zeros_kwargs)
-                    if cost[closed_Z]>bb:
-                        bb=cost[closed_Z] #max(bb,cost[closed_Z])
-                        if return_track:
-                            bb_set=(J,K,closed_Z)
-                if bb<b:
-                    b=bb #min(b,bb)
-                    if return_track:
-                        b_set=bb_set
-            for v in V-Z:
-                closed_Z=Z.union(FrozenBitset([v],capacity=n))
-                closed_Z=push_zeros(neighbors, subgraph=V, filled_set=closed_Z,
-                                    return_bitset=True, **push_zeros_kwargs)
-                if cost[closed_Z]+1<c:
-                    c=cost[closed_Z]+1 #min(c, cost[closed_Z]+1)
-                    if return_track:
-                        c_vertex=v
-                        c_closed=closed_Z
-            if b<c:
-                cost[Z]=b #min(b,c)
-                if return_track:
-                    track[Z]=('set: hand %s to adversary; adversary hands back %s, push to get %s'%([map(R,i) for i in b_set[0]], [map(R,i) for i in b_set[1]], map(R,b_set[2])), b_set[2])
-            else:
-                cost[Z]=c #min(b,c)
-                if return_track:
-                    track[Z]=('spend vertex %s, get %s'%(reverse_map[c_vertex],map(R,c_closed)), c_closed)
+    rule = Zq_native_rules.get(push_zeros)
+    native = rule is not None and n <= 63
+    parallel = native and ncpus is not None and ncpus > 1
+    if cost_table is None:
+        cost = Zq_cost_table(n, shared=parallel)
+    else:
+        if len(cost_table) < 2**n:
+            raise ValueError("the cost table needs at least 2^%s entries"%n)
+        if parallel and not _is_shared_table(cost_table):
+            raise ValueError("the cost table needs to be shared to use several processes")
+        cost = cost_table
+        if changed_vertex is None:
+            cost.fill(ZQ_UNSET)
+    if changed_vertex is not None and cost_table is None:
+        raise ValueError("changed_vertex needs the cost table of the earlier call")
+    cost[2**n-1] = 0
+    if parallel:
+        value = _Zq_bitset_layers(neighbors, q, rule, push_zeros_kwargs.get('looped'),
+                                  push_zeros_kwargs.get('unlooped'), cost, ncpus,
+                                  keep_mask=0 if changed_vertex is None else 1 << changed_vertex)
+    elif native:
+        value = Zq_bitset_native(neighbors, q, rule, push_zeros_kwargs.get('looped'),
+                                 push_zeros_kwargs.get('unlooped'), cost,
+                                 -1 if changed_vertex is None else changed_vertex)
+    else:
+        if changed_vertex is not None:
+            # the costs of the sets containing changed_vertex are kept
+            sets=V.difference(FrozenBitset([changed_vertex],capacity=n))
+        else:
+            sets=V
+        for sizeZ in range(n-1,-1,-1):
+            for Z in subsets(sets, sizeZ):
+                Z=FrozenBitset(Z,capacity=n)
+                if push_zeros(neighbors, subgraph=V, filled_set=Z, return_bitset=False,
+                              **push_zeros_kwargs):
+                    #print "can push, so skipping", Z
+                    continue
+                b, adversary, c, spend = _Zq_moves(G, q, push_zeros, push_zeros_kwargs, cost, Z)
+                cost[_bitset_mask(Z)]=min(b,c)
+        start = _bitset_mask(push_zeros(neighbors, subgraph=V, 
+                                        filled_set=FrozenBitset([], capacity=n), 
+                                        return_bitset=True, **push_zeros_kwargs))
+        value = int(cost[start])
     if return_track:
-        trail=''
-        Z=FrozenBitset([], capacity=n)
-        while Z!=FrozenBitset(V,capacity=n):
-            trail+='%s\n'%(track[Z],)
-            Z=track[Z][1]
-        return cost[push_zeros(neighbors, subgraph=V, 
-                               filled_set=FrozenBitset([], capacity=n), 
-                               return_bitset=True, **push_zeros_kwargs)], trail
+        return value, _Zq_trail(G, q, push_zeros, push_zeros_kwargs, cost)
     else:
-        return cost[push_zeros(neighbors, subgraph=V, 
-                               filled_set=FrozenBitset([], capacity=n), 
-                               return_bitset=True, **push_zeros_kwargs)]
+        return value
 
+def _Zq_moves(G, q, push_zeros, push_zeros_kwargs, cost, Z):
+    """
+    Return the best moves from the closed set ``Z`` in the dynamic
+    program of :func:`Zq_bitset`, given the costs of the larger sets.
 
+    Returns ``(b, adversary, c, spend)``, where ``b`` is the least cost
+    of handing components to the adversary and ``adversary`` is the
+    choice ``(H, J, K, closed)`` that gives it: the components ``H``,
+    the indices ``J`` of the ones handed to the adversary, the indices
+    ``K`` of the ones handed back, and the closed set that results.
+    ``c`` is the least cost of spending a vertex and ``spend`` is the
+    choice ``(v, closed)`` that gives it.  The choices are None when
+    there are none.  A move that leads back to ``Z`` costs `n`, so
+    this gives the same moves while the dynamic program runs and
+    afterwards.
+    """
+    reverse_map, R, n, V, neighbors, workspace = G
+    Z_mask=_bitset_mask(Z)
+    def closed_cost(closed):
+        closed_mask=_bitset_mask(closed)
+        return n if closed_mask==Z_mask else cost[closed_mask]
+    b=n
+    c=n
+    adversary=None
+    spend=None
+    H=[FrozenBitset(s,capacity=n) for s in
+       neighbors_connected_components(neighbors, V.difference(Z))]
+    # The same sets of components K come up in many choices J,
+    # so the closure after handing back K is found only once.
+    # K is a tuple of indices into H.
+    closures={}
+    for J in subsets(range(len(H)),q+1):
+        bb=-1
+        for K in subsets(J):
+            closed_Z=closures.get(K)
+            if closed_Z is None:
+                subgraph=Bitset(Z,capacity=n)
+                for i in K:
+                    subgraph.update(H[i])
+                closed_Z=push_zeros(neighbors, subgraph=subgraph, 
+                            filled_set=Z, return_bitset=True, **push_zeros_kwargs)
+                closed_Z=push_zeros(neighbors, subgraph=V, 
+                            filled_set=closed_Z, return_bitset=True, **push_zeros_kwargs)
+                closures[K]=closed_Z
+            if closed_cost(closed_Z)>bb:
+                bb=closed_cost(closed_Z) #max(bb,cost[closed_Z])
+                bb_set=(H,J,K,closed_Z)
+        if bb<b:
+            b=bb #min(b,bb)
+            adversary=bb_set
+    for v in V-Z:
+        closed_Z=Z.union(FrozenBitset([v],capacity=n))
+        closed_Z=push_zeros(neighbors, subgraph=V, filled_set=closed_Z,
+                            return_bitset=True, **push_zeros_kwargs)
+        if spend is None or closed_cost(closed_Z)+1<c:
+            # costs are at most n, so even a vertex that does not
+            # help is a move
+            c=min(c, closed_cost(closed_Z)+1)
+            spend=(v,closed_Z)
+    return b, adversary, c, spend
 
-def Zqhat_recurse(G,q,looped,unlooped, BEST_LOWER_BOUND, BEST_LOOPS, CACHE, G_info):
+def _Zq_trail(G, q, push_zeros, push_zeros_kwargs, cost):
+    """
+    Return the sequence of actions that obtain the Zq value, from the
+    costs left in ``cost`` by :func:`Zq_bitset`.
+
+    Only the moves from the sets on the trail are needed, so they are
+    found again by :func:`_Zq_moves` when the trail is asked for,
+    instead of being kept for every set while the costs are computed.
+    """
+    reverse_map, R, n, V, neighbors, workspace = G
+    trail=''
+    Z=push_zeros(neighbors, subgraph=V, filled_set=FrozenBitset([], capacity=n),
+                 return_bitset=True, **push_zeros_kwargs)
+    while Z!=FrozenBitset(V,capacity=n):
+        b, adversary, c, spend = _Zq_moves(G, q, push_zeros, push_zeros_kwargs, cost, Z)
+        if b<c:
+            H, J, K, closed_Z = adversary
+            move=('set: hand %s to adversary; adversary hands back %s, push to get %s'%([map(R,H[i]) for i in J], [map(R,H[i]) for i in K], map(R,closed_Z)), closed_Z)
+        else:
+            v, closed_Z = spend
+            move=('spend vertex %s, get %s'%(reverse_map[v],map(R,closed_Z)), closed_Z)
+        trail+='%s\n'%(move,)
+        Z=closed_Z
+    return trail
+
+def Zq_reachable(G,q, push_zeros, push_zeros_kwargs=dict(), return_states=False):
+    """
+    Calculate Zq by a memoized search from the closure of the empty set.
+
+    This computes the same costs as :func:`Zq_bitset`, but only for
+    the sets reached from the closure of the empty set by spending a
+    vertex or by handing components to the adversary.  An adversary
+    choice is abandoned as soon as it is known to be no better than
+    the best one found, so its other sets are not visited.  On sparse
+    graphs this is a small fraction of the ``2^n`` sets swept by
+    :func:`Zq_bitset`.
+
+    The sets are integer masks.  For the rules of ``Zq_c`` on at most
+    63 vertices, the closures and components are found by the
+    :class:`GraphWorkspace` of the graph, without making any bitsets.
+
+    :param G: a simple undirected graph, or the output of :func:`Zq_graph_info`
+    :param q: the :math:`q` for the algorithm
+    :param push_zeros: a color change rule, as for :func:`Zq_bitset`
+    :param push_zeros_kwargs: extra arguments to the push_zeros function
+    :param return_states: if True, also return the number of sets
+        whose cost was computed
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zq_reachable
+        sage: from sage.graphs.Zq_c import push_zeros
+        sage: Zq_reachable(graphs.PetersenGraph(), 1, push_zeros=push_zeros)
+        5
+        sage: Zq_reachable(graphs.CycleGraph(12), 1, push_zeros=push_zeros, return_states=True)
+        (2, 323)
+    """
+    if not isinstance(G, tuple):
+        G = Zq_graph_info(G)
+    reverse_map, R, n, V, neighbors, workspace = G
+    if n<2:
+        raise ValueError("G needs to have 2 or more vertices")
+
+    full=2**n-1
+    if workspace is not None and Zq_native_rules.get(push_zeros) is not None:
+        if push_zeros is push_zeros_looped:
+            looped=_bitset_mask(push_zeros_kwargs['looped'])
+            unlooped=_bitset_mask(push_zeros_kwargs['unlooped'])
+            def closure(filled, subgraph=full):
+                return workspace.push_zeros_looped(subgraph, filled, looped, unlooped)
+        else:
+            def closure(filled, subgraph=full):
+                return workspace.push_zeros(subgraph, filled)
+        components=workspace.connected_components
+    else:
+        def bitset(mask):
+            return FrozenBitset([i for i in range(n) if mask >> i & 1], capacity=n)
+        def closure(filled, subgraph=full):
+            return _bitset_mask(push_zeros(neighbors, subgraph=bitset(subgraph),
+                                           filled_set=bitset(filled),
+                                           return_bitset=True, **push_zeros_kwargs))
+        def components(subgraph):
+            return [_bitset_mask(s) for s in
+                    neighbors_connected_components(neighbors, bitset(subgraph))]
+
+    cost={full: 0}
+    def Zq_cost(Z):
+        # Z is closed.  Every set reached from Z is larger than Z, except
+        # that an adversary move may give back Z itself, which then
+        # costs n, as in Zq_bitset.
+        if Z in cost:
+            return cost[Z]
+        cost[Z]=n
+        b=n
+        H=components(full & ~Z)
+        # the closure after handing back each tuple K of indices into H
+        closures={}
+        for J in subsets(range(len(H)), q+1):
+            bb=-1
+            for K in subsets(J):
+                closed=closures.get(K)
+                if closed is None:
+                    subgraph=Z
+                    for i in K:
+                        subgraph|=H[i]
+                    closed=closures[K]=closure(closure(Z, subgraph))
+                bb=max(bb, Zq_cost(closed))
+                if bb>=b:
+                    # the adversary does at least as well with J as
+                    # with the best choice so far
+                    break
+            b=min(b,bb)
+        c=n
+        for v in range(n):
+            if not Z >> v & 1:
+                c=min(c, Zq_cost(closure(Z | 1 << v))+1)
+        cost[Z]=min(b,c)
+        return cost[Z]
+
+    value=Zq_cost(closure(0))
+    if return_states:
+        return value, len(cost)
+    else:
+        return value
+
+# Zq_compute uses Zq_reachable for graphs with more vertices than
+# this, where the 2^n table of Zq_bitset gets too big, unless it is
+# asked for several processes (see Zq_compute_algorithm)
+Zq_reachable_threshold = 20
+
+# Zq_inertia_lower_bound asks Zq_all for this many values of q at a time
+Zq_all_block_size = 4
+
+def Zq_all(G, q_values, push_zeros=push_zeros, push_zeros_kwargs=dict()):
+    """
+    Calculate Zq for several values of q at once.
+
+    The sets, their components, and their closures do not depend on
+    `q`, so when the dynamic program runs in C (see
+    :func:`Zq_bitset`), they are found once for all the values of `q`
+    and only the adversary's choices are made for each `q` (see
+    :func:`Zq_all_native`).  Otherwise :func:`Zq_bitset` is run for
+    each `q`.
+
+    :param G: a simple undirected graph, or the output of :func:`Zq_graph_info`
+    :param q_values: a list of values of :math:`q`
+    :param push_zeros: a color change rule, as for :func:`Zq_bitset`
+    :param push_zeros_kwargs: extra arguments to the push_zeros function
+
+    :return: a dictionary mapping each value of `q` to :math:`Z_q`
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zq_all
+        sage: Zq_all(graphs.PetersenGraph(), [0, 1, 2, 10])
+        {0: 4, 1: 5, 2: 5, 10: 5}
+    """
+    q_values = sorted(set(q_values))
+    if not isinstance(G, tuple):
+        G = Zq_graph_info(G)
+    reverse_map, R, n, V, neighbors, workspace = G
+    if n<2:
+        raise ValueError("G needs to have 2 or more vertices")
+    rule = Zq_native_rules.get(push_zeros)
+    if rule is None or n > 63:
+        cost_table = Zq_cost_table(n)
+        return dict((q, Zq_bitset(G, q, push_zeros=push_zeros,
+                                  push_zeros_kwargs=push_zeros_kwargs,
+                                  cost_table=cost_table))
+                    for q in q_values)
+    cost_tables = Zq_cost_table(n, rows=len(q_values))
+    values = Zq_all_native(neighbors, q_values, rule, push_zeros_kwargs.get('looped'),
+                           push_zeros_kwargs.get('unlooped'), cost_tables)
+    return dict(zip(q_values, values))
+
+
+def Zqhat_invariant(neighbors, looped, unlooped, unmarked):
+    """
+    Return an invariant of a graph with some vertices looped and some
+    unlooped that is preserved by the isomorphisms that respect the
+    loops.
+
+    For each vertex, the invariant has its class (looped, unlooped,
+    or unmarked) and the numbers of its neighbors in each class.  It
+    is much cheaper than a canonical label, and nodes of the search in
+    :func:`Zqhat_recurse` with different invariants are never
+    isomorphic.
+    """
+    classes = (looped, unlooped, unmarked)
+    return tuple(sorted((c,)+tuple(len(neighbors[v].intersection(part)) for part in classes)
+                        for c, vertices in enumerate(classes) for v in vertices))
+
+def Zqhat_recurse(G,q,looped,unlooped, BEST_LOWER_BOUND, BEST_LOOPS, CACHE, G_info, cost_table=None, stats=None, donate=None, changed_vertex=None):
     """
     We construct a tree of possibilities of looping and unlooping
     vertices, where the root of the tree is all vertices unspecified,
@@ -379,21 +887,87 @@ def Zqhat_recurse(G,q,looped,unlooped, BEST_LOWER_BOUND, BEST_LOOPS, CACHE, G_in
     BEST_LOOPS is a list (in which case we will fill it with the loopsets that give us the lower bound)
     or it is False, in which case we can shortcut operations even more to run faster.
 
+    cost_table is a table from :func:`Zq_cost_table` that this node's call of
+    :func:`Zq_bitset` uses, or None to make a new one.  A child only differs from its
+    parent in the loop status of one vertex, so its Zq is computed from a copy of its
+    parent's costs, with only the sets not containing that vertex recomputed (see the
+    ``changed_vertex`` argument of :func:`Zq_bitset`).  The first child gets a copy
+    and the second child gets the table itself, so there is one table for each level
+    of the recursion.
+
+    changed_vertex is None, or the vertex whose loop status is the only difference
+    between this node and the node whose costs are in cost_table.
+
+    CACHE is a dictionary of the nodes already investigated, up to
+    permutations respecting loops.  It is keyed by
+    :func:`Zqhat_invariant`, which is cheap, and canonical labels are
+    only computed for nodes whose invariants collide.  The value is a
+    pair ``(node, labels)``, where ``node`` is the ``(looped,
+    unlooped)`` of the first node with the invariant, as tuples, while
+    it has not been labeled yet, or None, and ``labels`` is the set of
+    canonical labels of the other nodes with the invariant.  Entries
+    are only read and assigned, so CACHE can be a dictionary shared
+    between processes.
+
+    stats is None or a dictionary in which the number of nodes, of
+    canonical labels, and of calls to :func:`Zq_bitset` are counted,
+    along with the seconds spent on each kind of work.
+
+    donate is None or a function that is called with the looped and
+    unlooped sets of the second child of a node and the node's Zq
+    before the child is explored; if it returns True, the child is
+    left to another process (see :func:`_Zqhat_parallel`).
+
     """
     n=G.order()
     unmarked = Bitset(range(n))-looped-unlooped
+    if stats is not None:
+        stats['nodes'] += 1
+        start = time.time()
 
-    canonical_label = (G.canonical_label(partition=[list(looped), list(unlooped), list(unmarked)]).graph6_string(), len(looped), len(unlooped))
-    if canonical_label in CACHE:
+    def label(looped, unlooped, unmarked):
+        if stats is not None:
+            stats['canonical labels'] += 1
+        return G.canonical_label(partition=[list(looped), list(unlooped), list(unmarked)]).graph6_string()
+
+    invariant = Zqhat_invariant(G_info[4], looped, unlooped, unmarked)
+    if stats is not None:
+        stats['invariant seconds'] += time.time() - start
+        start = time.time()
+    entry = CACHE.get(invariant)
+    if entry is None:
+        # the first node with this invariant is labeled only if another
+        # node with the same invariant comes along
+        CACHE[invariant] = ((tuple(looped), tuple(unlooped)), set())
+        seen = False
+    else:
+        node, labels = entry
+        if node is not None:
+            node_unmarked = [v for v in range(n) if v not in node[0] and v not in node[1]]
+            labels.add(label(node[0], node[1], node_unmarked))
+        canonical_label = label(looped, unlooped, unmarked)
+        seen = canonical_label in labels
+        labels.add(canonical_label)
+        CACHE[invariant] = (None, labels)
+    if stats is not None:
+        stats['canonical label seconds'] += time.time() - start
+    if seen:
         # already investigated this node (up to permutation respecting loops)
         #print "skipping looped: %s, unlooped %s"%(looped, unlooped)
         return
-    else:
-        CACHE.add(canonical_label)
 
     # Zq = how many vertices is Black forced to use
+    if stats is not None:
+        stats['Zq evaluations'] += 1
+        start = time.time()
+    if cost_table is None:
+        cost_table=Zq_cost_table(n)
+        changed_vertex=None
     Zq=Zq_bitset(G_info,q,push_zeros=push_zeros_looped, 
-                 push_zeros_kwargs=dict(looped=looped,unlooped=unlooped))
+                 push_zeros_kwargs=dict(looped=looped,unlooped=unlooped),
+                 cost_table=cost_table, changed_vertex=changed_vertex)
+    if stats is not None:
+        stats['Zq seconds'] += time.time() - start
 
     if Zq<BEST_LOWER_BOUND[0]:
         # Some leaf in another branch of the tree is already doing better than this entire branch
@@ -423,8 +997,12 @@ def Zqhat_recurse(G,q,looped,unlooped, BEST_LOWER_BOUND, BEST_LOOPS, CACHE, G_in
         v=unmarked.pop()
 
         new_looped=looped.union(FrozenBitset([v],capacity=n))
+        child_table=Zq_cost_table(n)
+        child_table[:]=cost_table[:len(child_table)]
         Zqhat_recurse(G,q,looped=new_looped, unlooped=unlooped,
-                      BEST_LOWER_BOUND=BEST_LOWER_BOUND, BEST_LOOPS=BEST_LOOPS, CACHE=CACHE, G_info=G_info)
+                      BEST_LOWER_BOUND=BEST_LOWER_BOUND, BEST_LOOPS=BEST_LOOPS, CACHE=CACHE, G_info=G_info,
+                      cost_table=child_table, stats=stats, donate=donate, changed_vertex=v)
+        del child_table
 
 
         if BEST_LOOPS is False and Zq<=BEST_LOWER_BOUND[0]:
@@ -433,11 +1011,216 @@ def Zqhat_recurse(G,q,looped,unlooped, BEST_LOWER_BOUND, BEST_LOOPS, CACHE, G_in
             return
 
         new_unlooped=unlooped.union(FrozenBitset([v],capacity=n))
+        if donate is not None and donate(looped, new_unlooped, Zq):
+            return
         Zqhat_recurse(G,q,looped=looped,unlooped=new_unlooped,
-                      BEST_LOWER_BOUND=BEST_LOWER_BOUND, BEST_LOOPS=BEST_LOOPS, CACHE=CACHE, G_info=G_info)
+                      BEST_LOWER_BOUND=BEST_LOWER_BOUND, BEST_LOOPS=BEST_LOOPS, CACHE=CACHE, G_info=G_info,
+                      cost_table=cost_table, stats=stats, donate=donate, changed_vertex=v)
         return
 
-def Zqhat(G, q, return_loops=False):
+class _Zqhat_shared_bound(object):
+    """
+    The best lower bound of a parallel :func:`Zqhat` search, in memory
+    shared by the processes.
+
+    It is indexed like the list ``BEST_LOWER_BOUND`` of
+    :func:`Zqhat_recurse`, and a new value only replaces a smaller one.
+    """
+    def __init__(self, value):
+        import multiprocessing
+        self.value = multiprocessing.Value('i', value)
+
+    def __getitem__(self, i):
+        return self.value.value
+
+    def __setitem__(self, i, value):
+        with self.value.get_lock():
+            if value > self.value.value:
+                self.value.value = value
+
+# The graph, q, and graph information of the parallel Zqhat search;
+# set before the worker processes are forked.
+_Zqhat_parallel_args = None
+
+# _Zqhat_parallel checks on its processes this often while waiting
+Zqhat_poll_seconds = 1.0
+
+def _Zqhat_worker(tasks, bound, cache, idle, pending, finished, results):
+    """
+    Explore the subtrees of the loop assignment tree taken from
+    ``tasks`` for :func:`_Zqhat_parallel`, until a None is taken.
+
+    The second child of a node is put back in ``tasks`` instead of
+    being explored when some process is waiting for work.  ``pending``
+    counts the subtrees put in ``tasks`` and not yet explored, and the
+    process that explores the last one sets ``finished``.  The stats
+    of the process and the errors raised are put in ``results`` at
+    the end.
+    """
+    G, q, G_info = _Zqhat_parallel_args
+    n = G.order()
+    cost_table = Zq_cost_table(n)
+    stats = {'nodes': 0, 'canonical labels': 0, 'Zq evaluations': 0,
+             'invariant seconds': 0.0, 'canonical label seconds': 0.0, 'Zq seconds': 0.0}
+    errors = []
+    def donate(looped, unlooped, Zq):
+        if idle.value > 0:
+            with pending.get_lock():
+                pending.value += 1
+            tasks.put((tuple(looped), tuple(unlooped), Zq))
+            return True
+        return False
+    while True:
+        with idle.get_lock():
+            idle.value += 1
+        task = tasks.get()
+        with idle.get_lock():
+            idle.value -= 1
+        if task is None:
+            break
+        looped, unlooped, Zq = task
+        try:
+            # the Zq of the subtree is at most the Zq of its parent
+            if Zq > bound[0]:
+                Zqhat_recurse(G, q, FrozenBitset(looped, capacity=n),
+                              FrozenBitset(unlooped, capacity=n), BEST_LOWER_BOUND=bound,
+                              BEST_LOOPS=False, CACHE=cache, G_info=G_info,
+                              cost_table=cost_table, stats=stats, donate=donate)
+        except Exception as e:
+            errors.append('%s: %s'%(type(e).__name__, e))
+        finally:
+            with pending.get_lock():
+                pending.value -= 1
+                if pending.value == 0:
+                    finished.set()
+    results.put((stats, errors))
+
+def _Zqhat_parallel(G, q, G_info, lower_bound, ncpus, stats=None):
+    """
+    Return the largest Zq over the leaves of the loop assignment tree
+    of :func:`Zqhat_recurse`, searching with ``ncpus`` processes.
+
+    The processes take subtrees from a shared queue, prune with a
+    bound in shared memory, and share the cache of nodes already
+    investigated through a manager process.  A process that is
+    waiting for work gets the second child of the next node that a
+    busy process expands.  Races on the cache only mean that a node
+    may be explored twice, so the value is the same as in the serial
+    search.
+
+    A process that dies without raising an exception (killed by a
+    signal, or by the system when it runs out of memory) can not
+    report back, so the processes are checked every
+    ``Zqhat_poll_seconds`` seconds while waiting for them, and a
+    RuntimeError is raised if one of them has exited too early.
+
+    :param lower_bound: a known lower bound, which must be the Zq of
+        some leaf
+    :param stats: None or a dictionary, as for :func:`Zqhat`, to which
+        the counts and seconds of all processes are added
+    """
+    global _Zqhat_parallel_args
+    import multiprocessing
+    import Queue
+    n = G.order()
+    _Zqhat_parallel_args = (G, q, G_info)
+    manager = multiprocessing.Manager()
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    bound = _Zqhat_shared_bound(lower_bound)
+    idle = multiprocessing.Value('i', 0)
+    pending = multiprocessing.Value('i', 1)
+    finished = multiprocessing.Event()
+    cache = manager.dict()
+    workers = [multiprocessing.Process(target=_Zqhat_worker,
+                                       args=(tasks, bound, cache, idle, pending,
+                                             finished, results))
+               for i in range(ncpus)]
+    def check_workers(all_exited):
+        exitcodes = [w.exitcode for w in workers]
+        if (any(code not in (None, 0) for code in exitcodes)
+            or all_exited(code is not None for code in exitcodes)):
+            raise RuntimeError("a process of the parallel Zqhat search exited "
+                               "unexpectedly (exit codes %s)"%exitcodes)
+    try:
+        tasks.put(((), (), n+1))
+        for w in workers:
+            w.start()
+        # no process may exit before every subtree is explored
+        while not finished.wait(Zqhat_poll_seconds):
+            check_workers(any)
+        for w in workers:
+            tasks.put(None)
+        worker_results = []
+        while len(worker_results) < len(workers):
+            try:
+                worker_results.append(results.get(timeout=Zqhat_poll_seconds))
+            except Queue.Empty:
+                # a process that exited normally has already sent its results
+                check_workers(all)
+        for w in workers:
+            w.join()
+    finally:
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+        manager.shutdown()
+        _Zqhat_parallel_args = None
+    errors = [e for worker_stats, worker_errors in worker_results for e in worker_errors]
+    if errors:
+        raise RuntimeError("the parallel Zqhat search failed: %s"%'; '.join(errors))
+    if stats is not None:
+        for worker_stats, worker_errors in worker_results:
+            for key, value in worker_stats.items():
+                stats[key] += value
+    return bound[0]
+
+def Zqhat(G, q, return_loops=False, stats=None, ncpus=None):
+    """
+    Calculate the largest `Z_q` of ``G`` over all ways of putting
+    loops on its vertices.
+
+    :param G: a simple undirected graph with vertices `0, \\ldots, n-1`
+    :param q: the :math:`q` for the algorithm
+    :param return_loops: if True, also return the list of loop
+        assignments that give the largest value
+    :param stats: if a dictionary, it is filled with the number of
+        nodes of the search (``'nodes'``), of canonical labels
+        (``'canonical labels'``), and of calls to :func:`Zq_bitset`
+        (``'Zq evaluations'``), and the seconds spent computing
+        invariants, canonical labels, and `Z_q` (see
+        :func:`Zqhat_recurse`); with several processes, the counts and
+        seconds of all of them are added
+    :param ncpus: if greater than 1, search the loop assignments with
+        this many processes (see :func:`_Zqhat_parallel`).  To return
+        the loop assignments, the serial search is then run again with
+        the value found as its bound, which prunes every branch that
+        can not reach it, so the loop assignments are the same as
+        without ``ncpus``.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zqhat
+        sage: stats = {}
+        sage: Zqhat(graphs.PathGraph(4), 1, stats=stats)
+        1
+        sage: stats['nodes'] >= stats['canonical labels']
+        True
+        sage: Zqhat(graphs.PetersenGraph(), 1) == Zqhat(graphs.PetersenGraph(), 1, ncpus=2)
+        True
+    """
+    if stats is not None:
+        for key in ('nodes', 'canonical labels', 'Zq evaluations'):
+            stats[key] = 0
+        for key in ('invariant seconds', 'canonical label seconds', 'Zq seconds'):
+            stats[key] = 0.0
+    # The loopsets depend on the labels of G, so only the value is stored
+    store = get_result_store() if not return_loops else None
+    if store is not None:
+        graph6 = G.canonical_label().graph6_string()
+        value = store.get(graph6, 'Zqhat', (q,))
+        if value is not None:
+            return value
     n=G.order()
     full_set=FrozenBitset(range(n))
     empty_set=FrozenBitset([],capacity=n)
@@ -451,9 +1234,12 @@ def Zqhat(G, q, return_loops=False):
     else:
         BEST_LOOPS = False
     G_info = Zq_graph_info(G)
+    cost_table = Zq_cost_table(n)
+    leaf_bound = 0
     for loopset in [dict(looped=full_set,unlooped=empty_set), dict(looped=empty_set,unlooped=full_set)]:
         Zq = Zq_bitset(G_info,q,push_zeros=push_zeros_looped,
-                       push_zeros_kwargs=loopset)
+                       push_zeros_kwargs=loopset, cost_table=cost_table)
+        leaf_bound = max(leaf_bound, Zq)
         if Zq < BEST_LOWER_BOUND[0]:
             BEST_LOWER_BOUND[0] = Zq
             if BEST_LOOPS is not False:
@@ -461,15 +1247,101 @@ def Zqhat(G, q, return_loops=False):
         elif BEST_LOOPS is not False and Zq == BEST_LOWER_BOUND[0]:
             BEST_LOOPS.append(loopset)
 
-    Zqhat_recurse(G, q, FrozenBitset([], capacity=n),
-                  FrozenBitset([], capacity=n), BEST_LOWER_BOUND=BEST_LOWER_BOUND, BEST_LOOPS=BEST_LOOPS, CACHE=set(), G_info=G_info)
+    search = True
+    if ncpus is not None and ncpus > 1:
+        value = _Zqhat_parallel(G, q, G_info, leaf_bound, ncpus, stats=stats)
+        if not return_loops:
+            BEST_LOWER_BOUND[0] = value
+            search = False
+        elif value > 0:
+            # A node below the value can not lead to a leaf with the
+            # value, so the serial search seeded with it reaches the
+            # same leaves.  The loopsets above only end up in the
+            # list when the value is 0, so then the search is run as
+            # it is.
+            BEST_LOWER_BOUND[0] = value
+            BEST_LOOPS[:] = []
+    if search:
+        Zqhat_recurse(G, q, FrozenBitset([], capacity=n),
+                      FrozenBitset([], capacity=n), BEST_LOWER_BOUND=BEST_LOWER_BOUND, BEST_LOOPS=BEST_LOOPS, CACHE={}, G_info=G_info,
+                      cost_table=cost_table, stats=stats)
+    if store is not None:
+        store.set(graph6, 'Zqhat', (q,), BEST_LOWER_BOUND[0])
     if return_loops:
         return BEST_LOWER_BOUND[0], BEST_LOOPS
     else:
         return BEST_LOWER_BOUND[0]
 
-def Zq_compute(G,q):
-    return Zq_bitset(G,q,push_zeros=push_zeros)
+def Zq_compute_algorithm(n, ncpus=None, algorithm=None):
+    """
+    Return the algorithm that :func:`Zq_compute` uses for a graph.
+
+    :param n: the number of vertices of the graph
+    :param ncpus: the number of processes asked for
+    :param algorithm: the algorithm asked for, or None
+
+    :return: 'bitset' or 'reachable'.  If ``algorithm`` is None, this
+        is 'bitset' for graphs with at most ``Zq_reachable_threshold``
+        vertices or if ``ncpus`` is greater than 1, since only
+        :func:`Zq_bitset` uses several processes, and 'reachable'
+        otherwise.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zq_compute_algorithm
+        sage: Zq_compute_algorithm(10), Zq_compute_algorithm(24)
+        ('bitset', 'reachable')
+        sage: Zq_compute_algorithm(24, ncpus=8)
+        'bitset'
+        sage: Zq_compute_algorithm(24, ncpus=8, algorithm='reachable')
+        Traceback (most recent call last):
+        ...
+        ValueError: Zq_reachable does not use several processes; use algorithm='bitset'
+    """
+    if algorithm is None:
+        if n <= Zq_reachable_threshold or (ncpus is not None and ncpus > 1):
+            return 'bitset'
+        return 'reachable'
+    if algorithm == 'reachable' and ncpus is not None and ncpus > 1:
+        raise ValueError("Zq_reachable does not use several processes; use algorithm='bitset'")
+    if algorithm not in ('bitset', 'reachable'):
+        raise ValueError("unknown algorithm: %s"%algorithm)
+    return algorithm
+
+def Zq_compute(G,q,ncpus=None,algorithm=None):
+    """
+    Calculate Zq of a graph.
+
+    :param G: a simple undirected graph
+    :param q: the :math:`q` for the algorithm
+    :param ncpus: the number of processes for :func:`Zq_bitset`
+    :param algorithm: 'bitset' for :func:`Zq_bitset`, 'reachable' for
+        :func:`Zq_reachable`, or None to choose one with
+        :func:`Zq_compute_algorithm`
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq import Zq_compute
+        sage: Zq_compute(graphs.PetersenGraph(), 1)
+        5
+        sage: Zq_compute(graphs.PetersenGraph(), 1, algorithm='reachable')
+        5
+    """
+    n = G[2] if isinstance(G, tuple) else G.order()
+    algorithm = Zq_compute_algorithm(n, ncpus=ncpus, algorithm=algorithm)
+    if algorithm == 'bitset':
+        compute = lambda: Zq_bitset(G,q,push_zeros=push_zeros,ncpus=ncpus)
+    else:
+        compute = lambda: Zq_reachable(G,q,push_zeros=push_zeros)
+    store = get_result_store()
+    if store is None or isinstance(G, tuple):
+        return compute()
+    graph6 = G.canonical_label().graph6_string()
+    value = store.get(graph6, 'Zq', (q,))
+    if value is None:
+        value = compute()
+        store.set(graph6, 'Zq', (q,), value)
+    return value
 
 def Zplus(G):
    return Zq_compute(G,0)
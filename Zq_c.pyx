@@ -28,6 +28,12 @@ and a brute-force approach to trying various bitsets.
 
 include "sage/misc/bitset.pxi"
 from sage.misc.bitset cimport FrozenBitset, Bitset    
+from libc.stdint cimport uint64_t, uint8_t
+from libc.stdlib cimport malloc, free
+
+cdef extern from *:
+    int __builtin_ctzll(unsigned long long) nogil
+    int __builtin_popcountll(unsigned long long) nogil
     
 cpdef push_zeros(list neighbors, FrozenBitset subgraph, FrozenBitset filled_set, bint return_bitset=True):
     """
@@ -279,3 +285,612 @@ cpdef neighbors_connected_components(list neighbors, FrozenBitset subgraph):
     bitset_free(queue)
     bitset_free(component)
     return components
+
+
+
+#######################################################################
+# The Zq_bitset dynamic program on 64-bit masks
+#
+# Vertex i of a graph with at most 63 vertices is bit i of a uint64_t.
+# Nothing below needs the GIL, so the dynamic program runs without
+# any Python objects.
+#######################################################################
+
+cdef enum:
+    RULE_STANDARD = 0
+    RULE_LOOPED = 1
+
+cdef inline int first_bit(uint64_t x) nogil:
+    return __builtin_ctzll(x)
+
+cdef uint64_t push_zeros_mask(uint64_t *neighbors, uint64_t subgraph, uint64_t filled,
+                              int rule, uint64_t looped, uint64_t unlooped) nogil:
+    """
+    Return the filled set after running ``push_zeros`` (if ``rule`` is
+    ``RULE_STANDARD``) or ``push_zeros_looped`` (if ``rule`` is
+    ``RULE_LOOPED``) on masks.
+    """
+    cdef uint64_t unfilled = subgraph & ~filled
+    cdef uint64_t active = filled
+    cdef uint64_t todo, unfilled_neighbors, bit
+    cdef int v
+    cdef bint changed = True
+    if rule == RULE_LOOPED:
+        # Since unlooped vertices can push early, they are "active"
+        active |= unlooped
+    while changed:
+        changed = False
+        todo = active
+        while todo:
+            v = first_bit(todo)
+            bit = (<uint64_t>1) << v
+            todo &= ~bit
+            unfilled_neighbors = neighbors[v] & unfilled
+            if unfilled_neighbors == 0:
+                active &= ~bit
+            elif unfilled_neighbors & (unfilled_neighbors - 1) == 0:
+                # exactly one unfilled neighbor, so push to it
+                unfilled &= ~unfilled_neighbors
+                active = (active | unfilled_neighbors) & ~bit
+                changed = True
+        if rule == RULE_LOOPED:
+            # Check to see if any looped vertex can die alone
+            todo = unfilled & looped
+            while todo:
+                v = first_bit(todo)
+                bit = (<uint64_t>1) << v
+                todo &= ~bit
+                if neighbors[v] & unfilled == 0:
+                    unfilled &= ~bit
+                    changed = True
+    return filled | (subgraph & ~unfilled)
+
+cdef int mask_components(uint64_t *neighbors, uint64_t subgraph, uint64_t *components) nogil:
+    """
+    Store the masks of the connected components of ``subgraph`` in
+    ``components`` and return how many there are.
+    """
+    cdef int count = 0, v
+    cdef uint64_t remaining = subgraph
+    cdef uint64_t component, frontier, reached, todo
+    while remaining:
+        component = remaining & (~remaining + 1)
+        frontier = component
+        while frontier:
+            reached = 0
+            todo = frontier
+            while todo:
+                v = first_bit(todo)
+                todo &= todo - 1
+                reached |= neighbors[v]
+            frontier = reached & subgraph & ~component
+            component |= frontier
+        components[count] = component
+        count += 1
+        remaining &= ~component
+    return count
+
+cdef enum:
+    # The worst closure of each set of components is kept when there
+    # are at most this many components
+    ZQ_MEMO_BITS = 16
+
+cdef int Zq_adversary_cost(uint64_t *neighbors, int n, int q, int rule, uint64_t looped,
+                           uint64_t unlooped, uint8_t *cost, uint64_t *components, int h,
+                           int *chosen, uint8_t *best, uint64_t Z) nogil:
+    """
+    Return the least cost over the sets of ``q+1`` of the ``h``
+    components in ``components`` that can be handed to the adversary
+    at ``Z``, or ``n`` if there are not that many components.
+
+    Each set of components that the adversary can hand back is part of
+    many of the sets handed to it.  With at most ``ZQ_MEMO_BITS``
+    components, the sets of components are run through by size, and
+    ``best[K]`` is set to the worst cost over the nonempty subsets of
+    the set ``K`` of components, so each closure is found once and
+    each set handed to the adversary is a lookup.  ``best`` has room
+    for ``2^ZQ_MEMO_BITS`` entries.
+    """
+    cdef uint64_t V = ((<uint64_t>1) << n) - 1
+    cdef uint64_t K, rest, subgraph, closed, bit, last, t
+    cdef int i, j, bb, size
+    cdef int b = n
+    cdef int r = q + 1
+    if r > h:
+        return b
+    if h <= ZQ_MEMO_BITS:
+        for size in range(1, r+1):
+            # run through the sets of size components in increasing order
+            K = ((<uint64_t>1) << size) - 1
+            last = K << (h - size)
+            while True:
+                subgraph = Z
+                rest = K
+                while rest:
+                    j = first_bit(rest)
+                    rest &= rest - 1
+                    subgraph |= components[j]
+                closed = push_zeros_mask(neighbors, subgraph, Z, rule, looped, unlooped)
+                closed = push_zeros_mask(neighbors, V, closed, rule, looped, unlooped)
+                bb = cost[closed]
+                rest = K
+                while rest:
+                    bit = rest & (~rest + 1)
+                    rest &= rest - 1
+                    if K != bit and best[K ^ bit] > bb:
+                        bb = best[K ^ bit]
+                best[K] = bb
+                if size == r and bb < b:
+                    b = bb
+                if K == last:
+                    break
+                t = K | (K - 1)
+                K = (t + 1) | (((~t & (t + 1)) - 1) >> (first_bit(K) + 1))
+        return b
+    # hand each set J of r components to the adversary
+    for i in range(r):
+        chosen[i] = i
+    while True:
+        bb = -1
+        for K in range(1, (<uint64_t>1) << r):
+            subgraph = Z
+            rest = K
+            while rest:
+                j = first_bit(rest)
+                rest &= rest - 1
+                subgraph |= components[chosen[j]]
+            closed = push_zeros_mask(neighbors, subgraph, Z, rule, looped, unlooped)
+            closed = push_zeros_mask(neighbors, V, closed, rule, looped, unlooped)
+            if cost[closed] > bb:
+                bb = cost[closed]
+        if bb < b:
+            b = bb
+        # the next set of r components
+        i = r - 1
+        while i >= 0 and chosen[i] == h - r + i:
+            i -= 1
+        if i < 0:
+            break
+        chosen[i] += 1
+        for j in range(i+1, r):
+            chosen[j] = chosen[j-1] + 1
+    return b
+
+cdef int Zq_set_cost(uint64_t *neighbors, int n, int q, int rule, uint64_t looped,
+                      uint64_t unlooped, uint8_t *cost, uint64_t *components, int *chosen,
+                      uint8_t *best, uint64_t Z) nogil:
+    """
+    Set ``cost[Z]`` if ``Z`` can not push.  The costs of all larger
+    sets must already be set.
+
+    ``cost`` has ``2^n`` entries; ``components`` has room for ``n``
+    masks, ``chosen`` for ``q+1`` indices, and ``best`` for
+    ``2^ZQ_MEMO_BITS`` costs.
+    """
+    cdef uint64_t V = ((<uint64_t>1) << n) - 1
+    cdef uint64_t rest, closed
+    cdef int h, j, b, c
+    if push_zeros_mask(neighbors, V, Z, rule, looped, unlooped) != Z:
+        # Z can push, so skip it
+        return 0
+    c = n
+    cost[Z] = n
+    h = mask_components(neighbors, V & ~Z, components)
+    b = Zq_adversary_cost(neighbors, n, q, rule, looped, unlooped, cost,
+                          components, h, chosen, best, Z)
+    rest = V & ~Z
+    while rest:
+        j = first_bit(rest)
+        rest &= rest - 1
+        closed = push_zeros_mask(neighbors, V, Z | ((<uint64_t>1) << j),
+                                 rule, looped, unlooped)
+        if cost[closed] + 1 < c:
+            c = cost[closed] + 1
+    cost[Z] = b if b < c else c
+    return 0
+
+cdef int Zq_layer_kernel(uint64_t *neighbors, int n, int q, int rule, uint64_t looped,
+                          uint64_t unlooped, uint8_t *cost, uint64_t *components, int *chosen,
+                          uint8_t *best, uint64_t keep, int sizeZ, long shard,
+                          long nshards) nogil:
+    """
+    Set the costs of the sets of size ``sizeZ`` that do not meet
+    ``keep`` and whose position in the order of those sets is
+    ``shard`` modulo ``nshards``.
+    """
+    cdef uint64_t Z = ((<uint64_t>1) << sizeZ) - 1
+    cdef uint64_t last = Z << (n - sizeZ)
+    cdef uint64_t t
+    cdef long index = 0
+    # run through the subsets of size sizeZ in increasing order
+    while True:
+        if Z & keep == 0:
+            if index % nshards == shard:
+                Zq_set_cost(neighbors, n, q, rule, looped, unlooped, cost,
+                            components, chosen, best, Z)
+            index += 1
+        if Z == last:
+            break
+        # the next subset of the same size (Gosper's hack)
+        t = Z | (Z - 1)
+        Z = (t + 1) | (((~t & (t + 1)) - 1) >> (first_bit(Z) + 1))
+    return 0
+
+cdef int Zq_kernel(uint64_t *neighbors, int n, int q, int rule, uint64_t looped,
+                   uint64_t unlooped, uint8_t *cost, uint64_t *components, int *chosen,
+                   uint8_t *best, uint64_t keep) nogil:
+    """
+    Run the dynamic program of ``Zq_bitset`` and return `Z_q`.  The
+    costs of the sets that meet ``keep`` are already in ``cost``.
+    """
+    cdef int sizeZ
+    cost[((<uint64_t>1) << n) - 1] = 0
+    for sizeZ in range(n-1, -1, -1):
+        Zq_layer_kernel(neighbors, n, q, rule, looped, unlooped, cost,
+                        components, chosen, best, keep, sizeZ, 0, 1)
+    return cost[push_zeros_mask(neighbors, ((<uint64_t>1) << n) - 1, 0, rule, looped, unlooped)]
+
+cdef int Zq_all_set_cost(uint64_t *neighbors, int n, int nq, int *qs, int rule,
+                          uint64_t looped, uint64_t unlooped, uint8_t *costs,
+                          uint64_t *components, int *chosen, uint64_t *closures,
+                          uint8_t *best, int *b, int *c, uint64_t Z) nogil:
+    """
+    Set the cost of ``Z`` for each of the ``nq`` values ``qs``, where
+    the costs for ``qs[k]`` are ``costs[k*2^n:(k+1)*2^n]``.
+
+    Whether ``Z`` can push, its components, and the closures after
+    spending a vertex or after the adversary hands back a set of
+    components do not depend on `q`, so they are found once.  With at
+    most ``ZQ_MEMO_BITS`` components, the closure of each set of
+    components is stored in ``closures``, and the worst closure in
+    each set of components is found for each `q` by running through
+    the sets in increasing order in ``best``.
+    """
+    cdef uint64_t size = (<uint64_t>1) << n
+    cdef uint64_t V = size - 1
+    cdef uint64_t K, rest, subgraph, closed, bit
+    cdef int h, j, k, r, rmax, bb, count
+    cdef uint8_t *cost
+    if push_zeros_mask(neighbors, V, Z, rule, looped, unlooped) != Z:
+        # Z can push, so skip it
+        return 0
+    for k in range(nq):
+        costs[k*size + Z] = n
+        b[k] = n
+        c[k] = n
+
+    rest = V & ~Z
+    while rest:
+        j = first_bit(rest)
+        rest &= rest - 1
+        closed = push_zeros_mask(neighbors, V, Z | ((<uint64_t>1) << j),
+                                 rule, looped, unlooped)
+        for k in range(nq):
+            if costs[k*size + closed] + 1 < c[k]:
+                c[k] = costs[k*size + closed] + 1
+
+    h = mask_components(neighbors, V & ~Z, components)
+    if h <= ZQ_MEMO_BITS:
+        rmax = 0
+        for k in range(nq):
+            if rmax < qs[k] + 1 <= h:
+                rmax = qs[k] + 1
+        if rmax > 0:
+            for K in range(1, (<uint64_t>1) << h):
+                if __builtin_popcountll(K) > rmax:
+                    continue
+                subgraph = Z
+                rest = K
+                while rest:
+                    j = first_bit(rest)
+                    rest &= rest - 1
+                    subgraph |= components[j]
+                closed = push_zeros_mask(neighbors, subgraph, Z, rule, looped, unlooped)
+                closures[K] = push_zeros_mask(neighbors, V, closed, rule, looped, unlooped)
+            for k in range(nq):
+                r = qs[k] + 1
+                if r > h:
+                    continue
+                cost = costs + k*size
+                for K in range(1, (<uint64_t>1) << h):
+                    count = __builtin_popcountll(K)
+                    if count > r:
+                        continue
+                    # the worst closure over the nonempty subsets of K
+                    bb = cost[closures[K]]
+                    rest = K
+                    while rest:
+                        bit = rest & (~rest + 1)
+                        rest &= rest - 1
+                        if K != bit and best[K ^ bit] > bb:
+                            bb = best[K ^ bit]
+                    best[K] = bb
+                    if count == r and bb < b[k]:
+                        b[k] = bb
+    else:
+        for k in range(nq):
+            b[k] = Zq_adversary_cost(neighbors, n, qs[k], rule, looped, unlooped,
+                                     costs + k*size, components, h, chosen, best, Z)
+    for k in range(nq):
+        costs[k*size + Z] = b[k] if b[k] < c[k] else c[k]
+    return 0
+
+cdef int Zq_all_kernel(uint64_t *neighbors, int n, int nq, int *qs, int rule,
+                        uint64_t looped, uint64_t unlooped, uint8_t *costs,
+                        uint64_t *components, int *chosen, uint64_t *closures,
+                        uint8_t *best, int *b, int *c) nogil:
+    """
+    Run the dynamic program of ``Zq_bitset`` for ``nq`` values of `q`
+    at once.
+    """
+    cdef uint64_t size = (<uint64_t>1) << n
+    cdef uint64_t Z, last, t
+    cdef int sizeZ, k
+    for k in range(nq):
+        costs[k*size + size - 1] = 0
+    for sizeZ in range(n-1, -1, -1):
+        Z = ((<uint64_t>1) << sizeZ) - 1
+        last = Z << (n - sizeZ)
+        while True:
+            Zq_all_set_cost(neighbors, n, nq, qs, rule, looped, unlooped, costs,
+                            components, chosen, closures, best, b, c, Z)
+            if Z == last:
+                break
+            t = Z | (Z - 1)
+            Z = (t + 1) | (((~t & (t + 1)) - 1) >> (first_bit(Z) + 1))
+    return 0
+
+def _frozenbitset_mask(s):
+    """
+    Return the integer whose bits are the elements of ``s``.
+    """
+    mask = 0
+    for i in s:
+        mask |= 1 << i
+    return mask
+
+cdef class GraphWorkspace:
+    """
+    A graph on at most 63 vertices, for running the color change rules
+    on sets given as integer masks.
+
+    :func:`push_zeros`, :func:`push_zeros_looped`, and
+    :func:`neighbors_connected_components` take the neighbors as a
+    list of FrozenBitsets, and set up their scratch bitsets on every
+    call.  A workspace keeps the neighbors in a C array of masks and
+    has its scratch space allocated once, so it is much cheaper when
+    the same graph is used for many calls, as in the searches for
+    `Z_q`.  Bit `i` of a mask is vertex `i`.
+
+    :param neighbor_masks: the integers whose bits are the neighbors of
+        each vertex
+
+    EXAMPLES::
+
+        sage: from sage.graphs.Zq_c import GraphWorkspace
+        sage: w = GraphWorkspace([0b10, 0b101, 0b1010, 0b100])  # the path 0-1-2-3
+        sage: w.push_zeros(0b1111, 0b0001)
+        15
+        sage: w.push_zeros(0b1111, 0b0010)
+        2
+        sage: w.push_zeros_looped(0b1111, 0b0000, 0b0000, 0b0001)
+        2
+        sage: w.connected_components(0b1101)
+        [1, 12]
+    """
+    cdef int n
+    cdef uint64_t *neighbors
+    cdef uint64_t *components
+
+    def __cinit__(self, list neighbor_masks, *args, **kwargs):
+        cdef int i
+        self.n = len(neighbor_masks)
+        if self.n > 63:
+            raise ValueError("a graph workspace can have at most 63 vertices")
+        self.neighbors = <uint64_t *>malloc(max(self.n, 1)*sizeof(uint64_t))
+        self.components = <uint64_t *>malloc(max(self.n, 1)*sizeof(uint64_t))
+        if self.neighbors == NULL or self.components == NULL:
+            raise MemoryError
+        for i in range(self.n):
+            self.neighbors[i] = neighbor_masks[i]
+
+    def __dealloc__(self):
+        free(self.neighbors)
+        free(self.components)
+
+    def __len__(self):
+        return self.n
+
+    def push_zeros(self, uint64_t subgraph, uint64_t filled):
+        """
+        Return the mask of the filled vertices after zero forcing as
+        much as possible in ``subgraph``, like :func:`push_zeros`.
+        """
+        return push_zeros_mask(self.neighbors, subgraph, filled, RULE_STANDARD, 0, 0)
+
+    def push_zeros_looped(self, uint64_t subgraph, uint64_t filled, uint64_t looped,
+                          uint64_t unlooped):
+        """
+        Return the mask of the filled vertices after forcing as much
+        as possible in ``subgraph`` with the rule of
+        :func:`push_zeros_looped`.
+        """
+        return push_zeros_mask(self.neighbors, subgraph, filled, RULE_LOOPED, looped, unlooped)
+
+    def connected_components(self, uint64_t subgraph):
+        """
+        Return the list of masks of the connected components of
+        ``subgraph``, in the order of their smallest vertices.
+        """
+        cdef int i, h
+        h = mask_components(self.neighbors, subgraph, self.components)
+        return [self.components[i] for i in range(h)]
+
+cdef class Zq_workspace(GraphWorkspace):
+    """
+    The masks and scratch space used by the native dynamic program.
+    """
+    cdef int *chosen
+    cdef uint8_t *best
+    cdef uint64_t looped, unlooped
+
+    def __cinit__(self, list neighbor_masks, int q, looped_mask, unlooped_mask):
+        self.chosen = <int *>malloc((q+1)*sizeof(int))
+        self.best = <uint8_t *>malloc(sizeof(uint8_t) << ZQ_MEMO_BITS)
+        if self.chosen == NULL or self.best == NULL:
+            raise MemoryError
+        self.looped = looped_mask
+        self.unlooped = unlooped_mask
+
+    def __dealloc__(self):
+        free(self.chosen)
+        free(self.best)
+
+def Zq_bitset_native(list neighbors, int q, int rule, looped, unlooped, cost_table,
+                     int keep_vertex=-1):
+    """
+    Calculate `Z_q` with the dynamic program of ``Zq_bitset`` in C.
+
+    Use :func:`Zq_bitset`, which calls this function when it can.
+
+    :param neighbors: (list of FrozenBitsets) -- the neighbors of each
+        vertex; there can be at most 63 vertices
+    :param q: the :math:`q` for the algorithm
+    :param rule: ``Zq_native_rules[push_zeros]`` or
+        ``Zq_native_rules[push_zeros_looped]``
+    :param looped: (FrozenBitset) -- the vertices that are looped, or
+        None for the standard rule
+    :param unlooped: (FrozenBitset) -- the vertices that are not
+        looped, or None for the standard rule
+    :param cost_table: a C-contiguous NumPy array of ``uint8`` with at
+        least ``2^n`` entries, as made by ``Zq_cost_table``.  The
+        costs are written to it.
+    :param keep_vertex: if not -1, the costs of the sets containing
+        this vertex are already in ``cost_table`` and are kept
+
+    :returns: :math:`Z_q`
+    """
+    cdef int n = len(neighbors)
+    if n < 2 or n > 63:
+        raise ValueError("the native Zq_bitset needs between 2 and 63 vertices")
+    if q < 0:
+        raise ValueError("q must be nonnegative")
+    if (cost_table.dtype.itemsize != 1 or not cost_table.flags['C_CONTIGUOUS']
+        or len(cost_table) < 2**n):
+        raise ValueError("the cost table needs 2^%s contiguous bytes"%n)
+    if keep_vertex < -1 or keep_vertex >= n:
+        raise ValueError("keep_vertex must be -1 or a vertex")
+    if rule != RULE_LOOPED:
+        looped = unlooped = ()
+    cdef Zq_workspace w = Zq_workspace([_frozenbitset_mask(N) for N in neighbors], q,
+                                       _frozenbitset_mask(looped),
+                                       _frozenbitset_mask(unlooped))
+    cdef uint8_t *cost = <uint8_t *><size_t>cost_table.ctypes.data
+    cdef uint64_t keep = 0 if keep_vertex == -1 else (<uint64_t>1) << keep_vertex
+    cdef int result
+    with nogil:
+        result = Zq_kernel(w.neighbors, n, q, rule, w.looped, w.unlooped,
+                           cost, w.components, w.chosen, w.best, keep)
+    return result
+
+def Zq_layer_native(list neighbor_masks, int q, int rule, looped_mask, unlooped_mask,
+                    size_t address, int sizeZ, long shard, long nshards, keep_mask=0):
+    """
+    Set the costs of one shard of one layer of the dynamic program of
+    ``Zq_bitset``.
+
+    The sets of size ``sizeZ`` are taken in increasing order, and the
+    ones whose position is ``shard`` modulo ``nshards`` are done.  The
+    costs of all larger sets must already be in the table.  This is
+    the work done by each process when ``Zq_bitset`` runs in
+    parallel.
+
+    :param neighbor_masks: the integers whose bits are the neighbors of
+        each vertex
+    :param q: the :math:`q` for the algorithm
+    :param rule: a value of ``Zq_native_rules``
+    :param looped_mask: the integer whose bits are the looped vertices
+    :param unlooped_mask: the integer whose bits are the unlooped
+        vertices
+    :param address: the address of the ``2^n`` bytes of the cost
+        table, for example from ``ctypes.addressof``
+    :param keep_mask: the sets that meet this mask are skipped, since
+        their costs are already in the table
+    """
+    cdef int n = len(neighbor_masks)
+    if n < 2 or n > 63 or sizeZ < 0 or sizeZ >= n:
+        raise ValueError("the native Zq_bitset needs between 2 and 63 vertices")
+    if q < 0 or nshards < 1 or shard < 0 or shard >= nshards:
+        raise ValueError("invalid q or shard")
+    cdef Zq_workspace w = Zq_workspace(neighbor_masks, q, looped_mask, unlooped_mask)
+    cdef uint8_t *cost = <uint8_t *>address
+    cdef uint64_t keep = keep_mask
+    with nogil:
+        Zq_layer_kernel(w.neighbors, n, q, rule, w.looped, w.unlooped, cost,
+                        w.components, w.chosen, w.best, keep, sizeZ, shard, nshards)
+
+def Zq_all_native(list neighbors, list q_values, int rule, looped, unlooped, cost_tables):
+    """
+    Calculate `Z_q` for several values of `q` with one run of the
+    dynamic program of ``Zq_bitset`` in C.
+
+    Use :func:`Zq_all`, which calls this function when it can.
+
+    :param neighbors: (list of FrozenBitsets) -- the neighbors of each
+        vertex; there can be at most 63 vertices
+    :param q_values: the values of :math:`q`
+    :param rule: a value of ``Zq_native_rules``
+    :param looped: (FrozenBitset) -- the vertices that are looped, or
+        None for the standard rule
+    :param unlooped: (FrozenBitset) -- the vertices that are not
+        looped, or None for the standard rule
+    :param cost_tables: a C-contiguous NumPy array of ``uint8`` with a
+        row of ``2^n`` entries for each value of `q`.  The costs are
+        written to it.
+
+    :returns: the list of :math:`Z_q` for the values in ``q_values``
+    """
+    cdef int n = len(neighbors)
+    cdef int nq = len(q_values)
+    if n < 2 or n > 63:
+        raise ValueError("the native Zq_bitset needs between 2 and 63 vertices")
+    if nq == 0:
+        return []
+    if min(q_values) < 0:
+        raise ValueError("q must be nonnegative")
+    if (cost_tables.dtype.itemsize != 1 or not cost_tables.flags['C_CONTIGUOUS']
+        or cost_tables.shape != (nq, 2**n)):
+        raise ValueError("the cost tables need %s contiguous rows of 2^%s bytes"%(nq, n))
+    if rule != RULE_LOOPED:
+        looped = unlooped = ()
+    cdef int q_max = min(max(q_values), n)
+    cdef Zq_workspace w = Zq_workspace([_frozenbitset_mask(N) for N in neighbors], q_max,
+                                       _frozenbitset_mask(looped),
+                                       _frozenbitset_mask(unlooped))
+    cdef uint8_t *costs = <uint8_t *><size_t>cost_tables.ctypes.data
+    cdef int *qs = <int *>malloc(nq*sizeof(int))
+    cdef int *b = <int *>malloc(nq*sizeof(int))
+    cdef int *c = <int *>malloc(nq*sizeof(int))
+    cdef uint64_t *closures = <uint64_t *>malloc(sizeof(uint64_t) << ZQ_MEMO_BITS)
+    cdef int k
+    cdef uint64_t start
+    try:
+        if qs == NULL or b == NULL or c == NULL or closures == NULL:
+            raise MemoryError
+        for k in range(nq):
+            # there are never more than n components
+            qs[k] = min(q_values[k], n)
+        with nogil:
+            Zq_all_kernel(w.neighbors, n, nq, qs, rule, w.looped, w.unlooped, costs,
+                          w.components, w.chosen, closures, w.best, b, c)
+            start = push_zeros_mask(w.neighbors, ((<uint64_t>1) << n) - 1, 0,
+                                    rule, w.looped, w.unlooped)
+        return [int(cost_tables[k, start]) for k in range(nq)]
+    finally:
+        free(qs)
+        free(b)
+        free(c)
+        free(closures)
+
+# The color change rules that Zq_bitset_native implements
+Zq_native_rules = {push_zeros: RULE_STANDARD, push_zeros_looped: RULE_LOOPED}
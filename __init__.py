@@ -1,4 +1,5 @@
 import minrank
+import minrank_batch
 import zero_forcing_wavefront
 import zero_forcing_64
 import Zq
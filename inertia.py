@@ -81,6 +81,14 @@ class InertiaSet(object):
         defaults.update(kwargs)
         return points(p, *args, **defaults)
 
+try:
+    from result_store import get_result_store
+except ImportError:
+    # assume everything is in the global space
+    # this happens when, for example, someone "load"s the right files
+    # in the Sage notebook
+    pass
+
 import random
 one_one=InertiaSet([(1,1)])
 def inertia_set(g, f):
@@ -88,6 +96,12 @@ def inertia_set(g, f):
     g6=g.canonical_label().graph6_string()
     if g6 in inertia_cache:
         return inertia_cache[g6]
+    store=get_result_store()
+    if store is not None:
+        I=store.get(g6, 'inertia_set')
+        if I is not None:
+            inertia_cache[g6]=I
+            return I
     components=g.connected_components_subgraphs()
     I=InertiaSet([(0,0)], size=g.order())
     for c in components:
@@ -108,6 +122,8 @@ def inertia_set(g, f):
                                    InertiaSet([(0,0)]))
             I+=component_inertia
     inertia_cache[g6]=I
+    if store is not None:
+        store.set(g6, 'inertia_set', (), I)
     return I
 
 
@@ -355,7 +355,7 @@ def zerosgame(graph, initial_set=[]):
    return list(zero_set)
 
 
-def zero_forcing_set_bruteforce(graph, bound=None, all_sets=False):
+def zero_forcing_set_bruteforce(graph, bound=None, all_sets=False, counters=None, reduction=False):
    """
    Return a zero forcing set of minimum order that also has order
    less than the given bound.
@@ -364,6 +364,12 @@ def zero_forcing_set_bruteforce(graph, bound=None, all_sets=False):
    :param int bound: the maximum acceptable order for a zero-forcing set
    :param bool all_sets: whether to return all zero forcing sets 
        or just the first one
+   :param dict counters: if not None, the number of subsets tried is
+       stored in ``counters['subsets tried']``
+   :param bool reduction: if True, search a graph shrunk with
+       :func:`reduce_graph` and lift the set found with
+       :meth:`GraphReduction.lift_zero_forcing_set`; ignored if
+       all_sets is True
 
    :return: a zero-forcing set (or list of all zero-forcing sets if all_sets is True)
       of minimum order that also has order less than the bound if one exists; 
@@ -378,8 +384,20 @@ def zero_forcing_set_bruteforce(graph, bound=None, all_sets=False):
       False
       sage: zero-forcing_set_bruteforce(graphs.CompleteGraph(5), all_sets=True)
       [{0, 1, 2, 3}, {0, 1, 2, 4}, {0, 1, 3, 4}, {0, 2, 3, 4}, {1, 2, 3, 4}]
+      sage: zero_forcing_set_bruteforce(graphs.StarGraph(6), reduction=True)
+      {1, 3, 4, 5, 6}
    """
-   from sage.all import Subsets
+   from sage.all import Subsets, Set
+   if reduction and not all_sets:
+       reduced = reduce_graph(graph, parameter='Z')
+       if bound is not None:
+           if bound < reduced.offset:
+               return False
+           bound -= reduced.offset
+       zfs = zero_forcing_set_bruteforce(reduced.graph, bound, counters=counters)
+       if zfs is False:
+           return False
+       return Set(reduced.lift_zero_forcing_set(zfs))
    order=graph.order()
    if bound is None:
        bound = order
@@ -389,28 +407,39 @@ def zero_forcing_set_bruteforce(graph, bound=None, all_sets=False):
    zfs_sets=[]
    vertices=graph.vertices()
    mindegree=min(graph.degree())
+   tried=0
    for i in range(mindegree,bound+1):
        if found_zfs:
            break
        for subset in Subsets(vertices,i):
+           tried+=1
            outcome=zerosgame(graph,subset)
            if len(outcome)==order:
                if all_sets:
                    found_zfs=True
                    zfs_sets.append(subset)
                else:
+                   if counters is not None:
+                       counters['subsets tried']=tried
                    return subset
+   if counters is not None:
+       counters['subsets tried']=tried
    if found_zfs:
        return zfs_sets
    else:
        return False
 
 
-def find_Z(graph):
+def find_Z(graph, counters=None, reduction=False):
     """
     Returns the order of a smallest zero-forcing set of a graph
 
     :param graph: the graph on which to find a smallest zero-forcing set
+    :param counters: a dictionary in which to record the work done (see
+        :func:`zero_forcing_set_bruteforce`), or None
+    :param reduction: if True, first shrink the graph with
+        :func:`reduce_graph`, so that the brute force search runs on
+        a smaller graph
 
     :return: the minimum possible order for a zero-forcing set of the graph
 
@@ -419,9 +448,220 @@ def find_Z(graph):
         sage: from sage.graphs.minrank import find_Z
         sage: find_Z(graphs.CompleteGraph(5))
         4      
+        sage: find_Z(graphs.StarGraph(6), reduction=True)
+        5
 
     """
-    return len(zero_forcing_set_bruteforce(graph))
+    return len(zero_forcing_set_bruteforce(graph, counters=counters,
+                                           reduction=reduction))
+
+
+class GraphReduction(object):
+    """
+    A graph with its twins and pendant paths reduced, and the
+    information needed to lift results back to the original graph.
+
+    Two reductions are applied until neither changes the graph:
+
+    - A pendant path `v, p_1, \ldots, p_k` (each `p_i` has degree 2
+      except the leaf `p_k`, and `v` has degree at least 3) with
+      `k \geq 2` is shortened to the single leaf `p_1`.  This does
+      not change the zero forcing number, and by the cut vertex
+      method at `v` it lowers the minimum rank by `k-1`.
+
+    - A class of `k \geq 3` twins (vertices with the same closed
+      neighborhood, for true twins, or the same open neighborhood,
+      for false twins) is cut down to 2 of its vertices.  A zero
+      forcing set contains all but at most one vertex of each class,
+      and only one vertex of a class ever forces, so this lowers the
+      zero forcing number by `k-2`.  An optimal matrix for a graph
+      with two true twins `u, w` can be chosen with a nonzero
+      diagonal entry at `u`, so the other true twins can be added
+      back as multiples of the row of `u`; hence cutting down true
+      twins does not change the minimum rank.  False twins are only
+      reduced for the zero forcing number.
+
+    The reduced graph is an induced subgraph of the original graph.
+
+    :param graph: the graph to reduce
+    :param parameter: 'mr' or 'Z'; the parameter that is preserved
+        (up to ``offset``) by the reductions
+
+    Attributes:
+
+    - ``graph`` -- the reduced graph
+    - ``offset`` -- the parameter of the original graph minus the
+      parameter of the reduced graph
+    - ``removed`` -- the vertices that were deleted
+    - ``steps`` -- the reductions, in the order they were made
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import GraphReduction
+        sage: g = Graph({0:[1,4,7],1:[2],2:[3],4:[5],5:[6],7:[8],8:[9]})
+        sage: r = GraphReduction(g)
+        sage: r
+        Reduction of a graph on 10 vertices to 4 vertices (mr offset 6)
+        sage: r.graph.vertices()
+        [0, 1, 4, 7]
+        sage: r = GraphReduction(g, parameter='Z')
+        sage: r.graph.vertices(), r.offset
+        ([0, 1, 4], 1)
+        sage: r.lift_zero_forcing_set([1])
+        [3, 9]
+    """
+    def __init__(self, graph, parameter='mr'):
+        if parameter not in ('mr', 'Z'):
+            raise ValueError("parameter must be 'mr' or 'Z'")
+        self.parameter = parameter
+        self.original_order = graph.order()
+        self.offset = 0
+        self.removed = []
+        self.steps = []
+
+        neighbors = dict((v, set(graph.neighbors(v))) for v in graph.vertices())
+        changed = True
+        while changed:
+            changed = self._reduce_pendant_paths(neighbors)
+            changed = self._reduce_twins(neighbors) or changed
+        self.graph = graph.subgraph([v for v in graph.vertices() 
+                                     if v in neighbors])
+
+    def __repr__(self):
+        return "Reduction of a graph on %s vertices to %s vertices (%s offset %s)" \
+            % (self.original_order, self.graph.order(), self.parameter, self.offset)
+
+    def _delete(self, neighbors, vertices):
+        """
+        Delete vertices from the neighbors dictionary.
+        """
+        for v in vertices:
+            for w in neighbors.pop(v):
+                if w in neighbors:
+                    neighbors[w].discard(v)
+        self.removed.extend(vertices)
+
+    def _reduce_pendant_paths(self, neighbors):
+        """
+        Shorten each pendant path to a single leaf.  Return True if
+        the graph changed.
+        """
+        changed = False
+        for leaf in [v for v in neighbors if len(neighbors[v]) == 1]:
+            # path is the pendant path from the leaf, without the
+            # vertex of degree at least 3 that it hangs from
+            path = [leaf]
+            (current,) = neighbors[leaf]
+            while len(neighbors[current]) == 2:
+                (next_vertex,) = neighbors[current].difference([path[-1]])
+                path.append(current)
+                current = next_vertex
+            # If current has degree 1, the component is a path, which
+            # we leave alone.
+            if len(neighbors[current]) >= 3 and len(path) >= 2:
+                removed = path[:-1]
+                self._delete(neighbors, removed)
+                self.steps.append(('pendant path', path[-1], leaf, removed))
+                if self.parameter == 'mr':
+                    self.offset += len(removed)
+                changed = True
+        return changed
+
+    def _reduce_twins(self, neighbors):
+        """
+        Cut each class of at least 3 twins down to 2 vertices.  Return
+        True if the graph changed.
+
+        Nontrivial classes of true twins and of false twins are
+        disjoint, and deleting a vertex outside a class keeps the
+        class a class of twins, so all classes can be reduced at once.
+        """
+        classes = {}
+        for v, N in neighbors.iteritems():
+            classes.setdefault(('true', frozenset(N.union([v]))), []).append(v)
+            if self.parameter == 'Z':
+                classes.setdefault(('false', frozenset(N)), []).append(v)
+        changed = False
+        for (kind, N), members in classes.iteritems():
+            if len(members) >= 3:
+                members.sort()
+                removed = members[2:]
+                self._delete(neighbors, removed)
+                self.steps.append((kind + ' twins', members[:2], removed))
+                if self.parameter == 'Z':
+                    self.offset += len(removed)
+                changed = True
+        return changed
+
+    def lift(self, value):
+        """
+        Return the parameter of the original graph, given the
+        parameter (or a bound for it) of the reduced graph.
+        """
+        return value + self.offset
+
+    def lift_bounds(self, bounds):
+        """
+        Lift the result of :func:`minrank_bounds` on the reduced
+        graph to the original graph.
+
+        The first two entries (the lower and upper bounds, or the
+        dictionaries of bounds) are shifted by the offset; any other
+        entries are returned unchanged.
+        """
+        lifted = []
+        for bound in bounds[:2]:
+            if isinstance(bound, dict):
+                lifted.append(dict((k, self.lift(v)) for k, v in bound.items()))
+            else:
+                lifted.append(self.lift(bound))
+        return tuple(lifted) + tuple(bounds[2:])
+
+    def lift_zero_forcing_set(self, zfs):
+        """
+        Return a zero forcing set of the original graph, given a zero
+        forcing set of the reduced graph.
+
+        A minimum zero forcing set of the reduced graph gives a minimum
+        zero forcing set of the original graph if ``parameter`` is
+        'Z'.  The deleted twins are added to the set.  If the leaf of
+        a shortened pendant path is in the set, it is replaced by the
+        original leaf, which forces along the path.
+        """
+        zfs = set(zfs)
+        for step in reversed(self.steps):
+            if step[0] == 'pendant path':
+                kept, leaf, removed = step[1:]
+                if kept in zfs:
+                    zfs.remove(kept)
+                    zfs.add(leaf)
+            else:
+                zfs.update(step[2])
+        return sorted(zfs)
+
+
+def reduce_graph(graph, parameter='mr'):
+    """
+    Reduce the twins and pendant paths of a graph.
+
+    See :class:`GraphReduction`.
+
+    :param graph: the graph
+    :param parameter: 'mr' or 'Z'
+
+    :return: a :class:`GraphReduction`; its ``graph`` is the reduced
+        graph, and the ``parameter`` of the original graph is the
+        parameter of the reduced graph plus its ``offset``
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import reduce_graph
+        sage: reduce_graph(graphs.StarGraph(6), parameter='Z')
+        Reduction of a graph on 7 vertices to 3 vertices (Z offset 4)
+        sage: reduce_graph(graphs.StarGraph(6))
+        Reduction of a graph on 7 vertices to 7 vertices (mr offset 0)
+    """
+    return GraphReduction(graph, parameter=parameter)
 
 
 def has_forbidden_induced_subgraph(graph):
@@ -491,8 +731,286 @@ try:
     from zero_forcing_set_wavefront import zero_forcing_set_wavefront
 except ImportError:
     pass
+try:
+    from result_store import get_result_store
+except ImportError:
+    pass
+
+from sage.misc.cachefunc import cached_method
+import itertools
+import time
+
+class GraphAnalysis(object):
+    """
+    Invariants of a graph that are needed by several of the minimum
+    rank bounds.
+
+    Each invariant is computed the first time it is asked for and then
+    remembered, so that running all of the bounds on a graph computes
+    things like the diameter or the maximal cliques only once.  The
+    graph is not copied, so it should not be changed while the
+    analysis is in use.
+
+    :param graph: the graph to analyze
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import GraphAnalysis
+        sage: a = GraphAnalysis(graphs.PetersenGraph())
+        sage: a.diameter()
+        2
+        sage: a.is_tree(), a.is_planar(), a.is_outerplanar()
+        (False, False, False)
+        sage: a.degree_sequence()
+        [3, 3, 3, 3, 3, 3, 3, 3, 3, 3]
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    @cached_method
+    def distances(self):
+        """
+        Return the distances between all pairs of vertices, as a
+        dictionary of dictionaries.
+        """
+        return self.graph.distance_all_pairs()
+
+    @cached_method
+    def diameter(self):
+        """
+        Return the diameter of the graph, computed from
+        :meth:`distances`.  The diameter of a disconnected graph is
+        ``Infinity``.
+        """
+        from sage.all import Infinity
+        order = self.graph.order()
+        if order == 0:
+            return self.graph.diameter()
+        distances = self.distances()
+        if any(len(d) < order for d in distances.itervalues()):
+            # some vertices are not reachable from others
+            return Infinity
+        return max(max(d.itervalues()) for d in distances.itervalues())
+
+    @cached_method
+    def degree_sequence(self):
+        """
+        Return the degree sequence of the graph, in decreasing order.
+        """
+        return self.graph.degree_sequence()
+
+    @cached_method
+    def is_connected(self):
+        """
+        Return True if the graph is connected.
+        """
+        return self.graph.is_connected()
+
+    @cached_method
+    def connected_components(self):
+        """
+        Return the vertices of each connected component of the graph.
+        """
+        return self.graph.connected_components()
+
+    def connected_components_subgraphs(self):
+        """
+        Return the connected components of the graph as subgraphs.
+        """
+        return [self.graph.subgraph(c) for c in self.connected_components()]
+
+    @cached_method
+    def is_tree(self):
+        """
+        Return True if the graph is a tree.
+        """
+        return self.graph.is_tree()
+
+    @cached_method
+    def nonisolated_subgraph(self):
+        """
+        Return the graph with the vertices of degree zero deleted.
+
+        Old versions of Sage assume that planar testing does not have
+        vertices of degree zero.  Deleting vertices of degree zero
+        does not affect planarity or outerplanarity.
+        """
+        isolated = [v for v in self.graph.vertices() 
+                    if self.graph.degree(v) == 0]
+        if len(isolated) == 0:
+            return self.graph
+        h = self.graph.copy()
+        h.delete_vertices(isolated)
+        return h
+
+    @cached_method
+    def is_planar(self):
+        """
+        Return True if the graph is planar.
+        """
+        h = self.nonisolated_subgraph()
+        return h.order() == 0 or h.is_planar()
+
+    @cached_method
+    def is_outerplanar(self):
+        """
+        Return True if the graph is outerplanar.
+
+        A graph that is not planar is not outerplanar, so the
+        outerplanarity test is only run on planar graphs.  The test
+        changes the graph it is given, so it gets the analysis's copy
+        without the vertices of degree zero, if there is one, and the
+        analysis forgets that copy.
+        """
+        if not self.is_planar():
+            return False
+        h = self.nonisolated_subgraph()
+        if h is self.graph:
+            h = h.copy()
+        else:
+            self.nonisolated_subgraph.clear_cache()
+        return _is_outerplanar_inplace(h)
+
+    def planarity(self):
+        """
+        Return whether the graph is planar and whether it is
+        outerplanar.
+
+        Planarity is tested first, and outerplanarity is only tested
+        if the graph is planar.
+        """
+        planar = self.is_planar()
+        return planar, planar and self.is_outerplanar()
+
+    @cached_method
+    def blocks_and_cut_vertices(self):
+        """
+        Return the blocks and the cut vertices of the graph.
+        """
+        return self.graph.blocks_and_cut_vertices()
+
+    @cached_method
+    def block_cut_tree(self):
+        """
+        Return the :class:`BlockCutTree` of the graph.
+        """
+        return BlockCutTree(self.graph, self.blocks_and_cut_vertices())
+
+    @cached_method
+    def cliques_maximal(self):
+        """
+        Return the maximal cliques of the graph.
+        """
+        return self.graph.cliques_maximal()
+
+    @cached_method
+    def canonical_graph6(self):
+        """
+        Return the graph6 string of the canonical label of the graph,
+        which is the same for all graphs isomorphic to this one.
+        """
+        return self.graph.canonical_label().graph6_string()
+
+
+class CanonicalLRUCache(object):
+    """
+    A cache holding at most ``maxsize`` results, discarding the least
+    recently used result when it is full.
 
-def min_rank_by_bounds(graph, tests = ['precomputed', 'order', 'zero forcing', 'not path', 'forbidden minrank 2', 'not planar', 'not outer planar', 'clique cover', 'diameter']):
+    The keys are meant to start with the graph6 string of the
+    canonical label of a graph (see
+    :meth:`GraphAnalysis.canonical_graph6`), so that isomorphic
+    graphs share cached results.  The number of lookups that found
+    (``hits``) and did not find (``misses``) a result are counted.
+
+    :param maxsize: the maximum number of results to keep.  A cache
+        with ``maxsize`` 0 does not store anything.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import CanonicalLRUCache
+        sage: cache = CanonicalLRUCache(maxsize=2)
+        sage: cache.set('a', 1); cache.set('b', 2)
+        sage: cache.get('a')
+        1
+        sage: cache.set('c', 3)
+        sage: cache.get('b') is None
+        True
+        sage: cache.info()
+        {'hits': 1, 'maxsize': 2, 'misses': 1, 'size': 2}
+    """
+    def __init__(self, maxsize=10000):
+        from collections import OrderedDict
+        self._cache = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return "LRU cache with %s of at most %s results (%s hits, %s misses)"%(
+            len(self), self.maxsize, self.hits, self.misses)
+
+    def get(self, key, default=None):
+        """
+        Return the result stored for ``key``, or ``default`` if there
+        is none.
+        """
+        try:
+            value = self._cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        # reinsert to mark the result as the most recently used
+        self._cache[key] = value
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Store ``value`` as the result for ``key``.
+        """
+        if self.maxsize <= 0:
+            return
+        self._cache.pop(key, None)
+        self._cache[key] = value
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def resize(self, maxsize):
+        """
+        Change the maximum number of results kept, discarding the
+        least recently used results if there are too many.
+        """
+        self.maxsize = maxsize
+        while len(self._cache) > max(maxsize, 0):
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all results and reset the hit and miss counts.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        Return a dictionary with the number of hits and misses and
+        the current and maximum number of results.
+        """
+        return dict(hits=self.hits, misses=self.misses, 
+                    size=len(self), maxsize=self.maxsize)
+
+# The results of minrank_bounds, keyed by the canonical graph6 string
+# of the graph and the tests run.  Use minrank_cache.resize(0) to turn
+# off caching.
+minrank_cache = CanonicalLRUCache(maxsize=10000)
+
+
+def min_rank_by_bounds(graph, tests = ['precomputed', 'order', 'zero forcing', 'not path', 'forbidden minrank 2', 'not planar', 'not outer planar', 'clique cover', 'diameter'], analysis=None, counters=None):
     """
     Return dictionaries giving the upper and lower bounds from running
     the specified tests.  If tests is not set, then all applicable
@@ -500,6 +1018,16 @@ def min_rank_by_bounds(graph, tests = ['precomputed', 'order', 'zero forcing', '
 
     :param graph: the graph for which to find bounds
 
+    :param analysis: a :class:`GraphAnalysis` of the graph, so that
+        invariants already computed for the graph are reused.  If
+        None, a new analysis is made.
+
+    :param counters: if not None, a dictionary in which the tests
+        that count their work store a dictionary of counters, keyed
+        by the name of the test: the subsets tried by 'zero forcing',
+        the closures stored by 'zero forcing fast', and the cliques
+        examined by 'clique cover'.
+
     :return: a list of 2 dictionaries; the upper and lower bounds,
     respectively.
 
@@ -516,10 +1044,19 @@ def min_rank_by_bounds(graph, tests = ['precomputed', 'order', 'zero forcing', '
           'order': 8})
         sage: min_rank_by_bounds(g, tests=['zero forcing', 'order', 'not path'])
         ({'zero forcing': 4}, {'not path': 7, 'order': 8})
+        sage: counters = {}
+        sage: min_rank_by_bounds(graphs.PathGraph(4), tests=['zero forcing', 'clique cover'], counters=counters)
+        ({'zero forcing': 3}, {'clique cover': 3, 'zero forcing (tree)': 3})
+        sage: counters
+        {'clique cover': {'clique sets tried': 0, 'maximal cliques': 3},
+         'zero forcing': {'subsets tried': 1}}
     """
     if isinstance(tests, str):
         tests = [tests]
 
+    if analysis is None:
+        analysis = GraphAnalysis(graph)
+
     order = graph.order()
     
     lower_bound = {}
@@ -535,22 +1072,30 @@ def min_rank_by_bounds(graph, tests = ['precomputed', 'order', 'zero forcing', '
         upper_bound['order'] = order - 1
 
     if 'zero forcing' in tests:
-        lower_bound['zero forcing'] = order - find_Z(graph)
+        if counters is None:
+            Z = find_Z(graph)
+        else:
+            counters['zero forcing'] = {}
+            Z = find_Z(graph, counters=counters['zero forcing'])
+        lower_bound['zero forcing'] = order - Z
         # Check if graph is a tree.  
         # If yes, then the ZFS will determine minimum rank.
-        if graph.is_tree():
+        if analysis.is_tree():
             upper_bound['zero forcing (tree)'] = lower_bound['zero forcing']
 
     if 'zero forcing fast' in tests:
-        lower_bound['zero forcing fast'] = order - zero_forcing_set_wavefront(graph)[0]
+        Z, zfs, num_closures = zero_forcing_set_wavefront(graph)
+        lower_bound['zero forcing fast'] = order - Z
+        if counters is not None:
+            counters['zero forcing fast'] = {'closures': num_closures}
         # Check if graph is a tree.  
         # If yes, then the ZFS will determine minimum rank.
-        if graph.is_tree():
+        if analysis.is_tree():
             upper_bound['zero forcing fast (tree)'] = lower_bound['zero forcing fast']
 
 
     if 'not path' in tests:
-        if graph.diameter() < order - 1:
+        if analysis.diameter() < order - 1:
             upper_bound['not path'] = order - 2
 
     if 'forbidden minrank 2' in tests:
@@ -560,23 +1105,28 @@ def min_rank_by_bounds(graph, tests = ['precomputed', 'order', 'zero forcing', '
             upper_bound['forbidden minrank 2'] = 2
 
     if 'diameter' in tests:
-        lower_bound['diameter'] = graph.diameter()
+        lower_bound['diameter'] = analysis.diameter()
+
+    if 'not planar' in tests or 'not outer planar' in tests:
+        planar, outerplanar = analysis.planarity()
 
     if 'not planar' in tests:
-        # Old versions of Sage assume that planar testing does not
-        # have vertices of degree zero.  We can delete vertices of
-        # degree zero without affecting the planarity.
-        h = graph.copy()
-        h.delete_vertices([v for v in h.vertices() if h.degree(v) == 0])
-        if h.order()>0 and h.is_planar() is False:
+        if planar is False:
             upper_bound['not planar'] = order - 4
     
     if 'not outer planar' in tests:
-        if is_outerplanar(graph) is False:
+        if outerplanar is False:
             upper_bound['not outer planar'] = order - 3
 
     if 'clique cover' in tests:
-        upper_bound['clique cover'] = len(edge_clique_cover_minimum(graph))
+        if counters is not None:
+            counters['clique cover'] = {}
+            clique_counters = counters['clique cover']
+        else:
+            clique_counters = None
+        upper_bound['clique cover'] = len(edge_clique_cover_minimum(graph,
+                                  max_cliques=analysis.cliques_maximal(),
+                                  counters=clique_counters))
         
     return (lower_bound, upper_bound)
 
@@ -604,11 +1154,10 @@ def find_rank_spread(vertex, graph):
         sage: find_rank_spread(2,g)
         (False, False)
     """
-    subgraph=graph.copy()
-    subgraph.delete_vertex(vertex)
     graph_bounds=minrank_bounds(graph)
     if graph_bounds[0]==graph_bounds[1]:
         # We have an actual min rank for graph
+        subgraph=graph.subgraph([v for v in graph if v != vertex])
         subgraph_bounds=minrank_bounds(subgraph)
         if subgraph_bounds[0]==subgraph_bounds[1]:
             # We have an actual min rank for the subgraph
@@ -616,7 +1165,7 @@ def find_rank_spread(vertex, graph):
     return False,False
 
                          
-def cut_vertex_connected_graph_mr(c_vertex,graph):
+def cut_vertex_connected_graph_mr(c_vertex,graph,block_cut_tree=None):
     """
     Given a cut vertex and a graph, attempt to calculate the minimum
     rank of the graph by applying the cut vertex method to the graph
@@ -624,6 +1173,8 @@ def cut_vertex_connected_graph_mr(c_vertex,graph):
 
     :param c_vertex: the cut vertex
     :param graph: the graph in which the cut vertex is contained
+    :param block_cut_tree: the :class:`BlockCutTree` of the graph, if
+        it is already known
 
     :return: a list of length 2 with the minimum rank as all entries,
         if the minimum rank can be calculated in this way
@@ -640,22 +1191,19 @@ def cut_vertex_connected_graph_mr(c_vertex,graph):
         ...
         ValueError: Supplied vertex is not a cut vertex
     """
-    g=graph.copy()
-    if g.is_connected() is False:#this should never happen
+    if graph.is_connected() is False:#this should never happen
         raise ValueError("Graph is not connected")
-    if c_vertex not in graph.vertices():#again, should never happen
+    if c_vertex not in graph:#again, should never happen
         raise ValueError("Supplied vertex is not in the graph")
-    g.delete_vertex(c_vertex)
-    subgraphs=g.connected_components_subgraphs()
-
-    if len(subgraphs) <= 1: # c_vertex is not a cut-vertex
+    if block_cut_tree is None:
+        block_cut_tree=BlockCutTree(graph)
+    if c_vertex not in block_cut_tree.cut_vertex_blocks:
         raise ValueError("Supplied vertex is not a cut vertex")
     
-    index=0
     rank_spread=0
     subgraph_mr_sum=0
-    for subgraph in subgraphs:
-        subgraph_with_v = graph.subgraph(subgraph.vertices()+[c_vertex])
+    for component in block_cut_tree.components(c_vertex):
+        subgraph_with_v = graph.subgraph(component+[c_vertex])
         new_rank_spread, subgraph_mr = \
             find_rank_spread(c_vertex, subgraph_with_v)
         if new_rank_spread is False:
@@ -668,7 +1216,355 @@ def cut_vertex_connected_graph_mr(c_vertex,graph):
     return subgraph_mr_sum+rank_spread, subgraph_mr_sum+rank_spread
 
 
-def minrank_bounds(graph, all_bounds=False, tests=['precomputed', 'order', 'zero forcing', 'zero forcing fast', 'not path', 'forbidden minrank 2', 'not planar', 'not outer planar', 'clique cover', 'cut vertex', 'disconnected', 'diameter']):
+def block_cut_tree_mr(graph, block_cut_tree=None, tests=None, max_branchings=10, counters=None):
+    """
+    Attempt to calculate the minimum rank of a connected graph by
+    dynamic programming over its block-cut tree.
+
+    The tree is rooted at a block.  For each block `B` with parent cut
+    vertex `p`, let `H_B` be `B` together with everything hanging
+    below it.  Working up from the leaves, we find `mr(H_B)` and
+    `mr(H_B-p)`.  At a cut vertex `c`, the branches hanging below `c`
+    are glued together using the cut vertex method, whose rank spread
+    at `c` is ``min(rank_spread, 2)`` as in
+    :func:`cut_vertex_connected_graph_mr`.  A block is then glued to
+    the branches at each of its child cut vertices in turn.  A branch
+    with rank spread 0 or 2 at `c` only needs the minimum rank of the
+    rest of the graph or of the rest of the graph without `c`, so
+    only the children with rank spread 1 double the number of
+    subgraphs of `B` whose minimum rank is needed.  For a chain of
+    blocks, each block needs at most four of them, so the work is
+    linear in the number of blocks.
+
+    The subgraphs of the blocks are bounded with
+    :func:`minrank_bounds`, which caches its results.
+
+    :param graph: a connected graph
+    :param block_cut_tree: the :class:`BlockCutTree` of the graph, if
+        it is already known
+    :param tests: the tests used to bound the subgraphs of the blocks;
+        if None, use the default tests of :func:`minrank_bounds`
+    :param max_branchings: give up on a block if more than this many
+        of its child cut vertices have rank spread 1
+    :param counters: if not None, a dictionary in which the number of
+        blocks and the number of subgraphs of blocks that were bounded
+        are stored as ``'blocks'`` and ``'subgraphs bounded'``
+
+    :return: the minimum rank, or False if the minimum rank of one of
+        the needed subgraphs of a block could not be calculated
+        exactly
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import block_cut_tree_mr
+        sage: block_cut_tree_mr(graphs.PathGraph(10))
+        9
+        sage: block_cut_tree_mr(graphs.StarGraph(5))
+        2
+        sage: g = graphs.CycleGraph(5)
+        sage: g.add_edges([(0,5), (5,6), (6,7), (7,5)])
+        sage: block_cut_tree_mr(g)
+        5
+    """
+    if block_cut_tree is None:
+        block_cut_tree = BlockCutTree(graph)
+    T = block_cut_tree
+    if tests is None:
+        bounds_kwds = {}
+    else:
+        bounds_kwds = {'tests': tests}
+
+    known_mr = {}
+    if counters is not None:
+        counters['blocks'] = len(T.blocks)
+        counters['subgraphs bounded'] = 0
+    def subgraph_mr(vertices):
+        # The minimum rank of the subgraph induced by vertices, or
+        # False if it is not known exactly
+        if len(vertices) == 0:
+            return 0
+        if vertices not in known_mr:
+            bounds = minrank_bounds(graph.subgraph(list(vertices)), **bounds_kwds)
+            if bounds[0] == bounds[1]:
+                known_mr[vertices] = bounds[0]
+            else:
+                known_mr[vertices] = False
+            if counters is not None:
+                counters['subgraphs bounded'] += 1
+        return known_mr[vertices]
+
+    # For each cut vertex c, branch[c] is (mr(D-c), rank spread of D
+    # at c), where D is everything hanging below c (including c)
+    branch = {}
+    # For each block B, branch_mr[B] is (mr(H_B), mr(H_B-p))
+    branch_mr = {}
+    for is_block, x in reversed(T.nodes):
+        if is_block:
+            parent = T.block_parent[x]
+            children = [c for c in T.block_cut_vertices[x] if c != parent]
+            if len([c for c in children if branch[c][1] == 1]) > max_branchings:
+                return False
+            block = frozenset(T.blocks[x])
+            glued_mr = {}
+            def glue(i, removed):
+                # The minimum rank of the block without the vertices
+                # in removed, with the branches at children[i:]
+                # attached.
+                if i == len(children):
+                    return subgraph_mr(block.difference(removed))
+                if (i, removed) in glued_mr:
+                    return glued_mr[i, removed]
+                c = children[i]
+                mr_minus, spread = branch[c]
+                if spread == 0:
+                    mr = glue(i+1, removed)
+                    if mr is not False:
+                        mr += mr_minus
+                else:
+                    mr = glue(i+1, removed.union([c]))
+                    if mr is not False:
+                        if spread == 2:
+                            mr += mr_minus + 2
+                        else:
+                            mr_with_c = glue(i+1, removed)
+                            if mr_with_c is False:
+                                mr = False
+                            else:
+                                mr += mr_minus + min(mr_with_c - mr + 1, 2)
+                glued_mr[i, removed] = mr
+                return mr
+
+            mr = glue(0, frozenset())
+            if mr is False:
+                return False
+            if parent is None:
+                # x is the root
+                return mr
+            mr_minus = glue(0, frozenset([parent]))
+            if mr_minus is False:
+                return False
+            branch_mr[x] = (mr, mr_minus)
+        else:
+            mr_minus = 0
+            rank_spread = 0
+            for j in T.cut_vertex_blocks[x]:
+                if j != T.cut_vertex_parent[x]:
+                    mr_minus += branch_mr[j][1]
+                    rank_spread += branch_mr[j][0] - branch_mr[j][1]
+            branch[x] = (mr_minus, min(rank_spread, 2))
+
+
+def cut_vertex_bounds(graph, analysis=None, tests=None, counters=None):
+    """
+    Return dictionaries giving the upper and lower bounds from the cut
+    vertex test of :func:`minrank_bounds`.
+
+    The minimum rank is calculated by :func:`block_cut_tree_mr`.  If
+    that fails, the cut vertex method is applied at a balanced cut
+    vertex of the graph.  If the graph does not have a cut vertex, or
+    neither method gives the minimum rank exactly, both dictionaries
+    are empty.
+
+    :param graph: a connected graph
+    :param analysis: a :class:`GraphAnalysis` of the graph, or None
+    :param tests: the tests used to bound the pieces of the graph; if
+        None, use the default tests of :func:`minrank_bounds`
+    :param counters: a dictionary in which to record the work done (see
+        :func:`block_cut_tree_mr`), or None
+
+    :return: a list of 2 dictionaries; the lower and upper bounds,
+        respectively.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import cut_vertex_bounds
+        sage: cut_vertex_bounds(graphs.PathGraph(4))
+        ({'cut vertex': 3}, {'cut vertex': 3})
+        sage: cut_vertex_bounds(graphs.CompleteGraph(4))
+        ({}, {})
+    """
+    if analysis is None:
+        analysis = GraphAnalysis(graph)
+    lower_bound = {}
+    upper_bound = {}
+    # work around a bug in the cut vertex routines; see
+    # http://trac.sagemath.org/sage_trac/ticket/7853
+    if graph.order()<=1 or len(analysis.block_cut_tree().cut_vertices)==0:
+        return lower_bound, upper_bound
+
+    mr = block_cut_tree_mr(graph, block_cut_tree=analysis.block_cut_tree(),
+                           tests=tests, counters=counters)
+    if mr is False:
+        c_vertex=analysis.block_cut_tree().balanced_cut_vertex()
+        cut_vertex_mr = cut_vertex_connected_graph_mr(c_vertex,graph,
+                                 block_cut_tree=analysis.block_cut_tree())
+        if cut_vertex_mr is not False:
+            mr = cut_vertex_mr[0]
+    if mr is not False:
+        lower_bound['cut vertex'] = mr
+        upper_bound['cut vertex'] = mr
+    return lower_bound, upper_bound
+
+
+def _single_test_bounds(graph, test, analysis, tests, counters=None):
+    """
+    Run one test of :func:`minrank_bounds` on a connected graph.
+
+    This is the function that :func:`min_rank_by_bounds_parallel`
+    runs in each forked process.  If ``counters`` is not None, the
+    time taken and the counters of the test are returned after the
+    bounds, since a forked process cannot change the caller's
+    dictionary.
+
+    An exception raised by the test is returned as the pair
+    ``('error', message)``, since ``p_iter_fork`` would report it as
+    ``'NO DATA'``, the same as a timeout.
+    """
+    try:
+        if counters is None:
+            if test == 'cut vertex':
+                return cut_vertex_bounds(graph, analysis=analysis, tests=tests)
+            else:
+                return min_rank_by_bounds(graph, tests=[test], analysis=analysis)
+
+        start = time.time()
+        if test == 'cut vertex':
+            bounds = cut_vertex_bounds(graph, analysis=analysis, tests=tests,
+                                       counters=counters)
+        else:
+            test_counters = {}
+            bounds = min_rank_by_bounds(graph, tests=[test], analysis=analysis,
+                                        counters=test_counters)
+            counters.update(test_counters.get(test, {}))
+        return bounds[0], bounds[1], time.time() - start, counters
+    except Exception as e:
+        return ('error', '%s: %s' % (type(e).__name__, e))
+
+
+def min_rank_by_bounds_parallel(graph, tests, timeout, ncpus=None, analysis=None, records=None):
+    """
+    Run each of the specified tests in its own forked process, giving
+    each test at most ``timeout`` seconds of wall time.
+
+    A test that runs out of time (or whose process dies) is killed and
+    contributes no bounds; its name is returned in the list of tests
+    that did not finish.  A test that raises an exception is not a
+    timeout: once all the tests are done, a RuntimeError naming the
+    tests that failed and their errors is raised, as the exception
+    would have been if the tests had run in this process.
+
+    :param graph: a connected graph
+    :param tests: a list of tests, as for :func:`minrank_bounds`
+    :param timeout: the number of seconds each test is allowed to run
+    :param ncpus: the number of tests to run at the same time; if
+        None, use the number of cpus on the machine
+    :param analysis: a :class:`GraphAnalysis` of the graph, or None
+    :param records: if not None, a list to which a dictionary is
+        appended for each test, giving the test, the seconds it took,
+        its counters (see :func:`min_rank_by_bounds`), and whether it
+        timed out.  Since the tests run at the same time, ``improved``
+        is True if the test gave the best lower or upper bound.
+
+    :return: a list of 3 items: the lower bounds and upper bounds
+        dictionaries, and a sorted list of the tests that timed out
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank import min_rank_by_bounds_parallel
+        sage: min_rank_by_bounds_parallel(graphs.PathGraph(4), ['order', 'zero forcing'], timeout=10)
+        ({'zero forcing': 3}, {'order': 3, 'zero forcing (tree)': 3}, [])
+    """
+    from sage.parallel.use_fork import p_iter_fork
+    if ncpus is None:
+        from sage.parallel.ncpus import ncpus as number_of_cpus
+        ncpus = number_of_cpus()
+
+    if analysis is None:
+        analysis = GraphAnalysis(graph)
+
+    lower_bound = {}
+    upper_bound = {}
+    timed_out = []
+    run_tests = p_iter_fork(ncpus, timeout=timeout)
+    # 'disconnected' does not apply to a connected graph
+    if records is None:
+        counters = None
+    else:
+        counters = {}
+    inputs = [((graph, test, analysis, tests, counters), {}) for test in tests 
+              if test != 'disconnected']
+    test_records = []
+    errors = []
+    for (args, kwds), bounds in run_tests(_single_test_bounds, inputs):
+        if isinstance(bounds, tuple) and bounds[0] == 'error':
+            errors.append('%s: %s' % (args[1], bounds[1]))
+        elif isinstance(bounds, str) and bounds.startswith('NO DATA'):
+            # The process timed out or died, so it contributes nothing
+            timed_out.append(args[1])
+            if records is not None:
+                test_records.append({'test': args[1], 'seconds': timeout,
+                                     'timed out': True, 'counters': {},
+                                     'lower': {}, 'upper': {}})
+        else:
+            lower_bound.update(bounds[0])
+            upper_bound.update(bounds[1])
+            if records is not None:
+                test_records.append({'test': args[1], 'seconds': bounds[2],
+                                     'timed out': False, 'counters': bounds[3],
+                                     'lower': bounds[0], 'upper': bounds[1]})
+    if errors:
+        raise RuntimeError("tests failed: %s" % '; '.join(sorted(errors)))
+    for record in test_records:
+        # record whether the test gave one of the best bounds
+        lower = record.pop('lower').values()
+        upper = record.pop('upper').values()
+        record['improved'] = (
+            (len(lower) > 0 and max(lower) == max(lower_bound.values()))
+            or (len(upper) > 0 and min(upper) == min(upper_bound.values())))
+        records.append(record)
+    return lower_bound, upper_bound, sorted(timed_out)
+
+
+def _instrumented_bounds(graph, tests, analysis, lower_bound, upper_bound, records):
+    """
+    Run the tests of :func:`minrank_bounds` on a connected graph one at
+    a time, updating the bounds dictionaries and appending a record of
+    each test to ``records``.
+    """
+    for test in tests:
+        if test == 'disconnected':
+            continue
+        best_lower = max(lower_bound.values())
+        best_upper = min(upper_bound.values())
+        bounds = _single_test_bounds(graph, test, analysis, tests, counters={})
+        lower_bound.update(bounds[0])
+        upper_bound.update(bounds[1])
+        lower = max(lower_bound.values())
+        upper = min(upper_bound.values())
+        records.append({'test': test, 'seconds': bounds[2],
+                        'timed out': False, 'counters': bounds[3],
+                        'improved': lower > best_lower or upper < best_upper,
+                        'lower': lower, 'upper': upper})
+
+_minrank_bounds_calls = itertools.count(1)
+
+def _emit_records(instrument, records, call_start, graph, bounds, cached):
+    """
+    Send the test records of one call of :func:`minrank_bounds`, and a
+    record for the whole call, to ``instrument``.
+    """
+    call = _minrank_bounds_calls.next()
+    records.append({'test': 'total', 'seconds': time.time() - call_start,
+                    'order': graph.order(), 'cached': cached,
+                    'lower': bounds[0], 'upper': bounds[1]})
+    for record in records:
+        record['call'] = call
+        if callable(instrument):
+            instrument(record)
+        else:
+            instrument.append(record)
+
+def minrank_bounds(graph, all_bounds=False, tests=['precomputed', 'order', 'zero forcing', 'zero forcing fast', 'not path', 'forbidden minrank 2', 'not planar', 'not outer planar', 'clique cover', 'cut vertex', 'disconnected', 'diameter'], timeout=None, ncpus=None, analysis=None, instrument=None, reduction=False):
     """
     Find lower and upper bounds for the minimum rank of a graph.  If
     all_bounds is False, then only return the best lower and upper
@@ -687,8 +1583,58 @@ def minrank_bounds(graph, all_bounds=False, tests=['precomputed', 'order', 'zero
             outer planar', 'clique cover', 'cut vertex',
             'disconnected'
 
-    :return: the lower and upper bounds for the minimum rank, in that
-      order
+    :param timeout: if not None, run the tests in parallel in separate
+            processes (see :func:`min_rank_by_bounds_parallel`) and
+            kill any test that runs longer than ``timeout`` seconds.
+            A test that is killed contributes no bounds.  A test that
+            raises an exception is not counted as timed out; a
+            RuntimeError is raised instead.
+
+    :param ncpus: the number of tests to run at the same time if
+            ``timeout`` is given; if None, use the number of cpus on
+            the machine
+
+    :param analysis: a :class:`GraphAnalysis` of the graph, so that
+            invariants already computed for the graph are reused.  If
+            None, a new analysis is made.
+
+    :param instrument: if not None, a list or a function.  The tests
+            are then run one at a time and timed, and a dictionary
+            for each test is appended to the list (or passed to the
+            function) when the call finishes.  Each dictionary has
+            the keys ``'call'`` (a number identifying this call),
+            ``'test'``, ``'seconds'``, ``'improved'`` (whether the test
+            improved the best bounds found by the earlier tests),
+            ``'lower'`` and ``'upper'`` (the best bounds after the
+            test), ``'timed out'``, and ``'counters'`` (the work done
+            by the test; see :func:`min_rank_by_bounds` and
+            :func:`block_cut_tree_mr`).  A last dictionary, with
+            ``'test'`` equal to ``'total'``, gives the time, order,
+            and bounds for the whole call, and whether the bounds came
+            from ``minrank_cache``.  The components of a disconnected
+            graph are recorded as separate calls.
+
+    :param reduction: if True, first shrink the graph with
+            :func:`reduce_graph`, find the bounds of the reduced
+            graph, and lift them back with
+            :meth:`GraphReduction.lift_bounds`.  ``analysis`` is
+            ignored if the graph is reduced.
+
+    :return: the pair ``(lower, upper)`` of the lower and upper
+      bounds for the minimum rank (or of the dictionaries of bounds,
+      if ``all_bounds`` is True).  If ``timeout`` is given, the triple
+      ``(lower, upper, timed_out)`` is returned instead, where
+      ``timed_out`` is a sorted list of the tests that timed out.
+
+    The best bounds are remembered in ``minrank_cache`` (see
+    :class:`CanonicalLRUCache`), so later calls on isomorphic graphs
+    with the same tests, including the calls made by the cut vertex
+    and disconnected tests, reuse them.  If a result store is set (see
+    :func:`set_result_store`), the best bounds are also looked up in
+    and saved to the store.  The dictionaries returned when
+    ``all_bounds`` is True are cached and stored too, apart from the
+    best bounds.  Results are not cached or stored if ``timeout`` is
+    given.
 
 
     EXAMPLES::
@@ -705,9 +1651,9 @@ def minrank_bounds(graph, all_bounds=False, tests=['precomputed', 'order', 'zero
         'precomputed': 1,
         'rank': 3})
         sage: minrank_bounds(graphs.PathGraph(4), all_bounds=True)
-        ({'cut vertex (1)': 3, 'precomputed': 3, 'rank': 0, 'zero forcing': 3},
+        ({'cut vertex': 3, 'precomputed': 3, 'rank': 0, 'zero forcing': 3},
         {'clique cover': 3,
-        'cut vertex (1)': 3,
+        'cut vertex': 3,
         'order': 3,
         'precomputed': 3,
         'rank': 4,
@@ -735,6 +1681,18 @@ def minrank_bounds(graph, all_bounds=False, tests=['precomputed', 'order', 'zero
         'not planar': 6,
         'order': 9,
         'rank': 10})
+        sage: minrank_bounds(graphs.PetersenGraph(), timeout=60)
+        (5, 6, [])
+        sage: records = []
+        sage: minrank_bounds(graphs.PathGraph(5), tests=['order', 'zero forcing'], instrument=records)
+        (4, 4)
+        sage: [(r['test'], r.get('improved'), r['lower'], r['upper']) for r in records]
+        [('order', True, 0, 4), ('zero forcing', True, 4, 4), ('total', None, 4, 4)]
+        sage: records[1]['counters']
+        {'subsets tried': 1}
+        sage: g = Graph({0:[1,4,7],1:[2],2:[3],4:[5],5:[6],7:[8],8:[9]})
+        sage: minrank_bounds(g, reduction=True)
+        (8, 8)
     """
     if isinstance(tests, str):
         tests = [tests]
@@ -745,37 +1703,91 @@ def minrank_bounds(graph, all_bounds=False, tests=['precomputed', 'order', 'zero
     if len(unknown_tests)>0:
         print "Unknown tests specified: ", list(unknown_tests)
 
-    g=graph.copy()
-    lower_bound = {'rank': 0}
-    upper_bound = {'rank': g.order()}
+    if reduction:
+        reduced = reduce_graph(graph, parameter='mr')
+        if len(reduced.removed) > 0:
+            bounds = minrank_bounds(reduced.graph, all_bounds=all_bounds,
+                                    tests=tests, timeout=timeout, ncpus=ncpus,
+                                    instrument=instrument)
+            return reduced.lift_bounds(bounds)
 
-    if g.is_connected():
-        bounds = min_rank_by_bounds(graph, tests=tests)
-        lower_bound.update(bounds[0])
-        upper_bound.update(bounds[1])
+    if analysis is None:
+        analysis = GraphAnalysis(graph)
 
-        # Try finding a cut vertex
-        if 'cut vertex' in tests:
-            # work around a bug in the cut vertex routines; see
-            # http://trac.sagemath.org/sage_trac/ticket/7853
-            if g.order()>1: 
-                c_vertex=cut_vertex_balanced(g)
+    if instrument is None:
+        records = None
+    else:
+        records = []
+        call_start = time.time()
+
+    use_cache = timeout is None and minrank_cache.maxsize > 0
+    store = get_result_store() if timeout is None else None
+    if use_cache or store is not None:
+        params = tuple(sorted(set(tests)))
+        if all_bounds is True:
+            # the bounds of each test are kept apart from the best bounds
+            params = (params, 'all')
+        cache_key = (analysis.canonical_graph6(), params)
+        bounds = minrank_cache.get(cache_key) if use_cache else None
+        if bounds is None and store is not None:
+            bounds = store.get(cache_key[0], 'minrank_bounds', cache_key[1])
+            if bounds is not None and use_cache:
+                minrank_cache.set(cache_key, bounds)
+        if bounds is not None:
+            if all_bounds is True:
+                # the caller may change the dictionaries
+                bounds = (dict(bounds[0]), dict(bounds[1]))
+                best = (max(bounds[0].values()), min(bounds[1].values()))
             else:
-                c_vertex=False
-            if c_vertex is not False:
-                cut_vertex_bounds = cut_vertex_connected_graph_mr(c_vertex,graph)
-                if cut_vertex_bounds is not False:
-                    lower_bound['cut vertex (%s)'%(c_vertex,)] = cut_vertex_bounds[0]
-                    upper_bound['cut vertex (%s)'%(c_vertex,)] = cut_vertex_bounds[1]
+                best = bounds
+            if instrument is not None:
+                _emit_records(instrument, records, call_start, graph, best, True)
+            return bounds
+
+    lower_bound = {'rank': 0}
+    upper_bound = {'rank': graph.order()}
+    timed_out = set()
+
+    if analysis.is_connected():
+        if timeout is None and instrument is not None:
+            _instrumented_bounds(graph, tests, analysis, lower_bound,
+                                 upper_bound, records)
+        elif timeout is None:
+            bounds = min_rank_by_bounds(graph, tests=tests, analysis=analysis)
+            lower_bound.update(bounds[0])
+            upper_bound.update(bounds[1])
+
+            # Try finding a cut vertex
+            if 'cut vertex' in tests:
+                bounds = cut_vertex_bounds(graph, analysis=analysis, tests=tests)
+                lower_bound.update(bounds[0])
+                upper_bound.update(bounds[1])
+        else:
+            bounds = min_rank_by_bounds_parallel(graph, tests=tests,
+                                                 timeout=timeout, ncpus=ncpus,
+                                                 analysis=analysis,
+                                                 records=records)
+            lower_bound.update(bounds[0])
+            upper_bound.update(bounds[1])
+            timed_out.update(bounds[2])
+            if records is not None:
+                # The tests ran at the same time, so only the final
+                # bounds are known
+                for record in records:
+                    record['lower'] = max(lower_bound.values())
+                    record['upper'] = min(upper_bound.values())
     else:
         if 'disconnected' in tests:
-            connected_components = g.connected_components_subgraphs()
             lower_bound['disconnected'] = 0
             upper_bound['disconnected'] = 0
-            for component in g.connected_components_subgraphs():
-                sub_bound = minrank_bounds(component, tests=tests)
+            for component in analysis.connected_components_subgraphs():
+                sub_bound = minrank_bounds(component, tests=tests,
+                                           timeout=timeout, ncpus=ncpus,
+                                           instrument=instrument)
                 lower_bound['disconnected'] += sub_bound[0]
                 upper_bound['disconnected'] += sub_bound[1]
+                if timeout is not None:
+                    timed_out.update(sub_bound[2])
 
     # Make sure that the lower bound is not greater than the upper bound
     if max(lower_bound.values()) > min(upper_bound.values()):
@@ -785,10 +1797,27 @@ lower bounds: %s
 upper bounds: %s""" % (lower_bound,upper_bound))
 
     if all_bounds is True:
-        return lower_bound, upper_bound
+        bounds = (lower_bound, upper_bound)
     else:
         # Return the best lower and upper bounds
-        return max(lower_bound.values()), min(upper_bound.values())
+        bounds = (max(lower_bound.values()), min(upper_bound.values()))
+    if use_cache:
+        if all_bounds is True:
+            minrank_cache.set(cache_key, (dict(lower_bound), dict(upper_bound)))
+        else:
+            minrank_cache.set(cache_key, bounds)
+    if store is not None:
+        store.set(cache_key[0], 'minrank_bounds', cache_key[1], bounds)
+    if instrument is not None:
+        if all_bounds is True:
+            best = (max(lower_bound.values()), min(upper_bound.values()))
+        else:
+            best = bounds
+        _emit_records(instrument, records, call_start, graph, best, False)
+    if timeout is not None:
+        return bounds + (sorted(timed_out),)
+    else:
+        return bounds
 
 
 
@@ -807,8 +1836,11 @@ def is_outerplanar(self, **kwds):
 
     :return: True if the graph is outer-planar; False if it is not
 
-    Any extra keyword options are passed to the ``is_circular_planar``
-    function on a copy of self.
+    A graph is outer-planar exactly when the graph with an extra
+    vertex joined to every vertex is planar, so this runs one
+    (linear-time) planarity test.  Any extra keyword options are
+    passed to the ``is_planar`` function on that graph, whose
+    vertices are relabeled `0, \ldots, n` with the extra vertex `n`.
 
     EXAMPLES::
 
@@ -821,24 +1853,215 @@ def is_outerplanar(self, **kwds):
 
     # Work around a bug in planarity testing by deleting degree 0 vertices
     h.delete_vertices([v for v in h.vertices() if h.degree(v) == 0])
-    if h.order()==0:
+    return _is_outerplanar_inplace(h, **kwds)
+
+
+def _is_outerplanar_inplace(h, **kwds):
+    """
+    Check if a graph without vertices of degree zero is outer-planar.
+
+    This is :func:`is_outerplanar` without the copy: the graph is
+    relabeled and gets an extra vertex, so it must not be used
+    afterwards.
+    """
+    n = h.order()
+    if n==0:
         return True
+    # An outer-planar graph with n>=2 vertices has at most 2n-3 edges
+    if h.size() > 2*n-3:
+        return False
+
+    h.relabel()
+    h.add_edges([(n, v) for v in xrange(n)])
+    return h.is_planar(**kwds)
+
+
+class BlockCutTree(object):
+    """
+    The block-cut tree of a graph (a forest if the graph is
+    disconnected), together with the number of vertices of the graph
+    that lie in each of its subtrees.
+
+    The nodes of the tree are the blocks and the cut vertices of the
+    graph, and a block is adjacent to each of the cut vertices it
+    contains.  Deleting a cut vertex `v` splits its connected
+    component into one piece for each block containing `v`; the piece
+    coming from a block is everything that can be reached from that
+    block in the tree without passing through `v`.  The sizes of all
+    of these pieces come from a single pass over the tree, so the
+    whole structure takes time linear in the order plus the size of
+    the graph.
+
+    :param graph: the graph
+    :param blocks_and_cut_vertices: the output of
+        ``graph.blocks_and_cut_vertices()``, if it is already known
+
+    EXAMPLES::
 
-    h.set_boundary(h.vertices())
-    kwds['ordered']=False
-    return h.is_circular_planar(**kwds)
+        sage: from sage.graphs.minrank import BlockCutTree
+        sage: T = BlockCutTree(graphs.PathGraph(5))
+        sage: sorted(T.cut_vertices)
+        [1, 2, 3]
+        sage: sorted(T.component_sizes(1))
+        [1, 3]
+        sage: sorted(T.components(1))
+        [[0], [2, 3, 4]]
+        sage: T.balanced_cut_vertex()
+        2
+    """
+    def __init__(self, graph, blocks_and_cut_vertices=None):
+        if blocks_and_cut_vertices is None:
+            blocks_and_cut_vertices = graph.blocks_and_cut_vertices()
+        blocks, cut_vertices = blocks_and_cut_vertices
+        self.graph = graph
+        self.blocks = blocks
+        self.cut_vertices = cut_vertices
+
+        # The cut vertices in each block, and the blocks containing
+        # each cut vertex.  These are the edges of the tree.
+        cut_vertex_set = set(cut_vertices)
+        self.block_cut_vertices = [[v for v in block if v in cut_vertex_set] 
+                                   for block in blocks]
+        self.cut_vertex_blocks = dict((v, []) for v in cut_vertices)
+        for i, block_cuts in enumerate(self.block_cut_vertices):
+            for v in block_cuts:
+                self.cut_vertex_blocks[v].append(i)
+
+        # Root each tree at a block and list the nodes (in self.nodes)
+        # so that each node comes after its parent.  A node is a pair
+        # (True, i) for the block blocks[i] or (False, v) for the cut
+        # vertex v.
+        self.block_parent = [None]*len(blocks)
+        self.cut_vertex_parent = {}
+        self._block_root = [None]*len(blocks)
+        self.roots = []
+        self.nodes = nodes = []
+        for root in range(len(blocks)):
+            if self._block_root[root] is not None:
+                continue
+            self.roots.append(root)
+            self._block_root[root] = root
+            stack = [(True, root)]
+            while stack:
+                is_block, x = stack.pop()
+                nodes.append((is_block, x))
+                if is_block:
+                    for v in self.block_cut_vertices[x]:
+                        if v != self.block_parent[x]:
+                            self.cut_vertex_parent[v] = x
+                            stack.append((False, v))
+                else:
+                    for j in self.cut_vertex_blocks[x]:
+                        if j != self.cut_vertex_parent[x]:
+                            self.block_parent[j] = x
+                            self._block_root[j] = root
+                            stack.append((True, j))
+
+        # The number of graph vertices in each subtree.  Each cut
+        # vertex counts itself and each block counts its vertices that
+        # are not cut vertices, so every vertex is counted once.
+        self._block_subtree_order = [len(block)-len(block_cuts) for block, block_cuts 
+                                     in zip(blocks, self.block_cut_vertices)]
+        self._cut_vertex_subtree_order = dict((v, 1) for v in cut_vertices)
+        for is_block, x in reversed(nodes):
+            if is_block:
+                parent = self.block_parent[x]
+                if parent is not None:
+                    self._cut_vertex_subtree_order[parent] += self._block_subtree_order[x]
+            else:
+                parent = self.cut_vertex_parent[x]
+                self._block_subtree_order[parent] += self._cut_vertex_subtree_order[x]
+
+    def component_order(self, v):
+        """
+        Return the order of the connected component containing the
+        cut vertex ``v``.
+        """
+        root = self._block_root[self.cut_vertex_parent[v]]
+        return self._block_subtree_order[root]
+
+    def component_sizes(self, v):
+        """
+        Return the orders of the pieces that the connected component
+        containing the cut vertex ``v`` splits into when ``v`` is
+        deleted, in the same order as ``self.cut_vertex_blocks[v]``.
+        """
+        sizes = []
+        for j in self.cut_vertex_blocks[v]:
+            if self.block_parent[j] == v:
+                sizes.append(self._block_subtree_order[j])
+            else:
+                # the piece containing the parent of v is everything
+                # outside of the subtree of v
+                sizes.append(self.component_order(v) 
+                             - self._cut_vertex_subtree_order[v])
+        return sizes
+
+    def components(self, v):
+        """
+        Return the vertices of each of the pieces that the connected
+        component containing the cut vertex ``v`` splits into when
+        ``v`` is deleted, in the same order as
+        ``self.cut_vertex_blocks[v]``.
+        """
+        pieces = []
+        for j in self.cut_vertex_blocks[v]:
+            vertices = set()
+            seen_cut_vertices = set([v])
+            stack = [j]
+            while stack:
+                block = stack.pop()
+                vertices.update(self.blocks[block])
+                for c in self.block_cut_vertices[block]:
+                    if c not in seen_cut_vertices:
+                        seen_cut_vertices.add(c)
+                        stack.extend(k for k in self.cut_vertex_blocks[c] 
+                                     if k != block)
+            vertices.discard(v)
+            pieces.append(sorted(vertices))
+        return pieces
+
+    def balanced_cut_vertex(self):
+        """
+        Return a cut vertex whose deletion leaves components with the
+        smallest possible maximum order, or ``False`` if the graph has
+        no cut vertex.  See :func:`cut_vertex_balanced`.
+        """
+        # Deleting a cut vertex leaves the other connected components
+        # alone, so we need the two largest component orders.
+        component_orders = sorted([self._block_subtree_order[root] 
+                                   for root in self.roots], reverse=True)+[0, 0]
+
+        #this will hold the "best" cut-vertex and the order of the largest
+        #connected component after deletion
+        best_v=(False,self.graph.order())
+        for v in self.cut_vertices:
+            if self.component_order(v) == component_orders[0]:
+                other_order = component_orders[1]
+            else:
+                other_order = component_orders[0]
+            max_order = max(max(self.component_sizes(v)), other_order)
+            if max_order<best_v[1]:
+                best_v=(v,max_order)
+        return best_v[0]
 
 
 # From the patch for generic_graph.py
-def cut_vertex_balanced(self):
+def cut_vertex_balanced(self, blocks_and_cut_vertices=None):
     """
     Returns a cut vertex which cuts the graph into pieces with
     smallest maximum size.
 
+    :param blocks_and_cut_vertices: the output of
+        ``self.blocks_and_cut_vertices()``, if it is already known
+
     :return: a cut-vertex (if one exists) that either results in
         components with a minimum of the maximum component order.
         If no cut vertex exists, returns ``False``.
 
+    The component orders are read from the :class:`BlockCutTree` of
+    the graph, so this takes linear time.
+
     EXAMPLES::
 
         sage: graphs.PathGraph(3).cut_vertex_balanced()
@@ -850,25 +2073,7 @@ def cut_vertex_balanced(self):
         sage: graphs.CompleteGraph(3).cut_vertex_balanced()
         False
     """
-    _,cut_vertices=self.blocks_and_cut_vertices()
-
-    vertices=self.vertices()
-    graph_cc_num=self.connected_components_number()
-    graph_order=self.order()
-
-    #this will hold the "best" cut-vertex and the order of the largest
-    #connected component after deletion
-    best_v=(False,graph_order)
-
-    #checks each vertex and determines the best one
-    for v in cut_vertices:
-        g=self.copy()
-        g.delete_vertex(v)
-        max_order = max(len(c) for c in g.connected_components())
-
-        if max_order<best_v[1]:
-            best_v=(v,max_order)
-    return best_v[0]
+    return BlockCutTree(self, blocks_and_cut_vertices).balanced_cut_vertex()
 
 # From the patch for graph.py
 def cliques_containing_edge(self, edge):
@@ -900,7 +2105,7 @@ def cliques_containing_edge(self, edge):
     return None
 
 # From the patch for graph.py
-def edge_clique_cover_minimum(self, bound=None):
+def edge_clique_cover_minimum(self, bound=None, max_cliques=None, counters=None):
     """
     Returns an minimum edge clique cover for the graph if the
     number of covering cliques is at most ``bound``; otherwise,
@@ -915,6 +2120,13 @@ def edge_clique_cover_minimum(self, bound=None):
     :param bound: the maximum number of cliques to consider in an
        edge clique cover
 
+    :param max_cliques: the maximal cliques of the graph, if they are
+       already known
+
+    :param counters: if not None, a dictionary in which the number of
+       maximal cliques and the number of sets of cliques examined are
+       stored as ``'maximal cliques'`` and ``'clique sets tried'``
+
     :return: If a minimum edge clique cover is found that has at
         most ``bound`` cliques, the edge clique cover is returned
         as a list of lists, each sublist being the vertices of a
@@ -932,12 +2144,18 @@ def edge_clique_cover_minimum(self, bound=None):
         sage: graphs.PetersenGraph().edge_clique_cover_minimum(bound=4)
     """
     from sage.all import ceil, Combinations
+    if counters is not None:
+        counters['maximal cliques'] = 0
+        counters['clique sets tried'] = 0
     # Take care of trivial case
     if self.size() == 0:
         return []
 
-    max_cliques=self.cliques_maximal()
-    max_cliques.sort(key=len)
+    if max_cliques is None:
+        max_cliques=self.cliques_maximal()
+    max_cliques=sorted(max_cliques, key=len)
+    if counters is not None:
+        counters['maximal cliques'] = len(max_cliques)
     largest_clique_vertices = len(max_cliques[-1])
     max_cliques = [sorted(clique) for clique in max_cliques]
     largest_clique_edges = largest_clique_vertices \
@@ -989,8 +2207,10 @@ def edge_clique_cover_minimum(self, bound=None):
 
     starting_point = max(1,ceil(float(num_edges) / largest_clique_edges) \
                              - len(mandatory_cliques))
+    tried = 0
     for i in range(starting_point,stopping_point+1):
         for set_of_cliques in Combinations(max_cliques,i):
+            tried += 1
             edges_in_set_of_cliques = set([])
             for clique in set_of_cliques+mandatory_cliques:
                 edges_in_clique = [(clique[i], clique[j]) 
@@ -998,5 +2218,9 @@ def edge_clique_cover_minimum(self, bound=None):
                                    for j in xrange(i+1,len(clique))]
                 edges_in_set_of_cliques.update(set(edges_in_clique))
             if len(edges_in_set_of_cliques) == num_edges:
+                if counters is not None:
+                    counters['clique sets tried'] = tried
                 return set_of_cliques+mandatory_cliques
+    if counters is not None:
+        counters['clique sets tried'] = tried
     return None
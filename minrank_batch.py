@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Minimum rank bounds for every graph in a file
+
+This module runs :func:`minrank_bounds` on each graph in a graph6 or
+sparse6 file (one graph per line, as written by ``geng`` or
+``nauty``), using a pool of processes, and writes one JSON object per
+line to an output file.  The input is read as it is needed, so memory
+use does not depend on the size of the input file.
+
+Each output line records the graph, the byte offsets of the graph's
+line in the input file, the best lower and upper bounds, the bounds
+from each test, and the time taken.  Results are written in the order
+of the input, so an interrupted run can be resumed from the
+``next_offset`` of the last complete line of the output.
+
+From the command line, run::
+
+    sage -python minrank_batch.py graphs.g6 results.jsonl --resume
+"""
+
+#######################################################################
+#
+# Copyright (C) 2011 Jason Grout.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#######################################################################
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+try:
+    from minrank import minrank_bounds
+except ImportError:
+    # assume everything is in the global space
+    # this happens when, for example, someone "load"s the right files
+    # in the Sage notebook
+    pass
+
+from sage.graphs.graph import Graph
+
+
+def graph6_lines(infile, offset=0):
+    """
+    Iterate over the graphs in a graph6 or sparse6 file.
+
+    Blank lines are skipped, and ``>>graph6<<`` and ``>>sparse6<<``
+    headers are removed.
+
+    :param infile: a file opened in binary mode
+    :param offset: the byte offset in the file to start reading from;
+        this must be the start of a line
+
+    :return: an iterator over triples ``(offset, next_offset, line)``,
+        where ``line`` (without the newline) starts at byte ``offset``
+        of the file and the next line starts at ``next_offset``.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_batch import graph6_lines
+        sage: from StringIO import StringIO
+        sage: list(graph6_lines(StringIO('>>graph6<<A_\\n\\nBw\\n')))
+        [(0, 13, 'A_'), (14, 17, 'Bw')]
+    """
+    infile.seek(offset)
+    while True:
+        line = infile.readline()
+        if not line:
+            break
+        next_offset = offset + len(line)
+        line = line.strip()
+        for header in ('>>graph6<<', '>>sparse6<<'):
+            if line.startswith(header):
+                line = line[len(header):]
+        if line:
+            yield offset, next_offset, line
+        offset = next_offset
+
+
+def _json_number(x):
+    """
+    Convert a bound to a number that can be written as JSON.
+    """
+    try:
+        return int(x)
+    except (TypeError, ValueError):
+        return str(x)
+
+
+def _batch_bounds(args):
+    """
+    Find the bounds of one graph for :func:`minrank_bounds_batch`.
+
+    This is the function that runs in the worker processes.  An error
+    in a test is recorded in the result instead of stopping the run.
+    """
+    offset, next_offset, line, tests = args
+    result = {'graph': line, 'offset': offset, 'next_offset': next_offset}
+    records = []
+    start = time.time()
+    try:
+        g = Graph(line)
+        result['order'] = int(g.order())
+        if tests is None:
+            lower, upper = minrank_bounds(g, all_bounds=True,
+                                          instrument=records)
+        else:
+            lower, upper = minrank_bounds(g, all_bounds=True, tests=tests,
+                                          instrument=records)
+        result['lower'] = _json_number(max(lower.values()))
+        result['upper'] = _json_number(min(upper.values()))
+        result['lower_bounds'] = dict((k, _json_number(v)) for k, v in lower.items())
+        result['upper_bounds'] = dict((k, _json_number(v)) for k, v in upper.items())
+    except Exception as e:
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+    result['seconds'] = time.time() - start
+    result['tests'] = [dict((k, _json_number(v)) if k in ('lower', 'upper')
+                            else (k, v) for k, v in record.items())
+                       for record in records]
+    return result
+
+
+def _resume_offset(outfile):
+    """
+    Prepare an output file of :func:`minrank_bounds_batch` for
+    resuming a run.
+
+    A partial last line, left by a run that was killed while writing,
+    is removed from the file.
+
+    :param outfile: the name of the output file
+
+    :return: the byte offset in the input file of the first graph that
+        does not have a result in the output file
+    """
+    if not os.path.exists(outfile):
+        return 0
+    f = open(outfile, 'r+b')
+    try:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        # Read backwards from the end until we have the last complete
+        # line, which is everything between the last two newlines
+        block = 4096
+        tail = ''
+        pos = size
+        while pos > 0:
+            read = min(block, pos)
+            pos -= read
+            f.seek(pos)
+            tail = f.read(read) + tail
+            end = tail.rfind('\n')
+            if end >= 0 and (pos == 0 or tail.rfind('\n', 0, end) >= 0):
+                break
+            block *= 2
+        end = tail.rfind('\n')
+        f.truncate(pos + end + 1)
+        if end < 0:
+            return 0
+        last_line = tail[tail.rfind('\n', 0, end) + 1:end]
+        return json.loads(last_line)['next_offset']
+    finally:
+        f.close()
+
+
+def minrank_bounds_batch(infile, outfile, ncpus=None, chunksize=16, tests=None, resume=False):
+    """
+    Find the minimum rank bounds of every graph in a graph6 or sparse6
+    file.
+
+    The graphs are given to a pool of ``ncpus`` processes in chunks of
+    ``chunksize`` graphs, and a process gets a new chunk as soon as it
+    finishes one.  At most a fixed number of chunks for each process
+    are read ahead of the results written, so memory use stays bounded
+    however large the input file is.  The results are written in the
+    order of the input, each as a JSON object on its own line with the
+    keys
+
+    - ``graph`` -- the graph6 or sparse6 string of the graph
+    - ``offset``, ``next_offset`` -- the byte offsets of the start of
+      the graph's line and of the next line in the input file
+    - ``order`` -- the number of vertices
+    - ``lower``, ``upper`` -- the best lower and upper bounds
+    - ``lower_bounds``, ``upper_bounds`` -- the bounds from each test
+    - ``seconds`` -- the time taken to find the bounds
+    - ``tests`` -- the time taken, counters, and so on for each test,
+      as recorded by the ``instrument`` option of
+      :func:`minrank_bounds`
+    - ``error`` -- only if something went wrong; then the bounds are
+      missing
+
+    :param infile: the name of the input file
+    :param outfile: the name of the output file
+    :param ncpus: the number of processes to use; if None, use the
+        number of cpus on the machine
+    :param chunksize: the number of graphs sent to a process at a time
+    :param tests: the tests passed to :func:`minrank_bounds`; if None,
+        use its default tests
+    :param resume: if True, keep the results already in ``outfile``
+        and continue with the graph after the last one there;
+        otherwise ``outfile`` is overwritten
+
+    If a result store is set, the bounds of each test are looked up in
+    it and saved to it (see :func:`minrank_bounds`), so graphs
+    isomorphic to graphs done before, in this run or an earlier one,
+    are not computed again.
+
+    :return: the number of graphs done in this run
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_batch import minrank_bounds_batch
+        sage: import json
+        sage: infile = tmp_filename(); outfile = tmp_filename()
+        sage: open(infile, 'w').write('\\n'.join(g.graph6_string() for g in [graphs.PathGraph(4), graphs.PetersenGraph()]) + '\\n')
+        sage: minrank_bounds_batch(infile, outfile, ncpus=2)
+        2
+        sage: [(r['order'], r['lower'], r['upper']) for r in map(json.loads, open(outfile))]
+        [(4, 3, 3), (10, 5, 6)]
+        sage: minrank_bounds_batch(infile, outfile, ncpus=2, resume=True)
+        0
+
+    With a result store (see :func:`set_result_store`), a graph
+    isomorphic to one already done is looked up in the store, even by
+    another process.  Here the in-memory ``minrank_cache`` is turned
+    off, so the second Petersen graph can only come from the store::
+
+        sage: from sage.graphs.result_store import set_result_store
+        sage: from sage.graphs.minrank import minrank_cache
+        sage: set_result_store(tmp_filename())
+        sage: minrank_cache.resize(0)
+        sage: g = graphs.PetersenGraph()
+        sage: h = g.relabel(range(9, -1, -1), inplace=False)
+        sage: open(infile, 'w').write(g.graph6_string() + '\n' + h.graph6_string() + '\n')
+        sage: minrank_bounds_batch(infile, outfile, ncpus=1)
+        2
+        sage: [(r['lower'], r['upper'], r['tests'][-1]['cached']) for r in map(json.loads, open(outfile))]
+        [(5, 6, False), (5, 6, True)]
+        sage: minrank_cache.resize(10000); set_result_store(None)
+    """
+    import multiprocessing
+    if ncpus is None:
+        from sage.parallel.ncpus import ncpus as number_of_cpus
+        ncpus = number_of_cpus()
+    if resume:
+        offset = _resume_offset(outfile)
+        mode = 'ab'
+    else:
+        offset = 0
+        mode = 'wb'
+    done = 0
+
+    # Pool.imap_unordered reads its input as fast as it can, so each
+    # graph takes a slot before it is handed to the pool, and gives it
+    # back when its result is written.  The offsets of the graphs
+    # handed out, in the order of the input, tell the writer which
+    # result comes next.
+    slots = threading.Semaphore(4 * ncpus * chunksize)
+    offsets = deque()
+    stopped = []
+    def work():
+        for start, end, line in graph6_lines(inp, offset):
+            slots.acquire()
+            if stopped:
+                return
+            offsets.append(start)
+            yield start, end, line, tests
+
+    inp = open(infile, 'rb')
+    out = open(outfile, mode)
+    pool = multiprocessing.Pool(ncpus)
+    try:
+        waiting = {}
+        for result in pool.imap_unordered(_batch_bounds, work(), chunksize):
+            waiting[result['offset']] = result
+            while offsets and offsets[0] in waiting:
+                result = waiting.pop(offsets.popleft())
+                out.write(json.dumps(result, sort_keys=True) + '\n')
+                done += 1
+                slots.release()
+            out.flush()
+    finally:
+        # let the pool's feeding thread finish if it is waiting for a slot
+        stopped.append(True)
+        slots.release()
+        pool.terminate()
+        pool.join()
+        out.close()
+        inp.close()
+    return done
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Find minimum rank bounds for each graph in a graph6 or sparse6 file and write them as JSON lines.')
+    parser.add_argument('infile', help='graph6 or sparse6 file, one graph per line')
+    parser.add_argument('outfile', help='output file of JSON lines')
+    parser.add_argument('--ncpus', type=int, default=None,
+                        help='number of processes (default: number of cpus)')
+    parser.add_argument('--chunksize', type=int, default=16,
+                        help='graphs sent to a process at a time')
+    parser.add_argument('--test', dest='tests', action='append', default=None,
+                        help='a test to run; may be given more than once (default: all tests)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue after the last result in outfile')
+    args = parser.parse_args()
+    minrank_bounds_batch(args.infile, args.outfile, ncpus=args.ncpus,
+                         chunksize=args.chunksize, tests=args.tests,
+                         resume=args.resume)
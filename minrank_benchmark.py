@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the zero forcing and minimum rank engines
+
+This module times each engine of the library on fixed collections of
+graphs (corpora) and writes the results as JSON.  The random corpora
+are generated from a seed with Python's own random number generator,
+so a corpus is the same on every machine and every version of Sage.
+
+Results can be saved as a baseline and later runs compared against
+it.  A run is flagged if an engine became slower on a corpus by more
+than a given fraction, or if its answers on a corpus changed.
+
+From the command line, run::
+
+    sage -python minrank_benchmark.py --save-baseline baseline.json
+    sage -python minrank_benchmark.py --baseline baseline.json --output new.json
+"""
+
+#######################################################################
+#
+# Copyright (C) 2011 Jason Grout.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#######################################################################
+
+import json
+import time
+import random
+import hashlib
+
+try:
+    from minrank import (atlas_graphs, find_Z, minrank_bounds, minrank_cache,
+                         edge_clique_cover_minimum)
+    from zero_forcing_64 import zero_forcing_set_bruteforce_cython
+    from zero_forcing_wavefront import zero_forcing_set_wavefront
+    from Zq import Zq_compute, Zqhat
+except ImportError:
+    # assume everything is in the global space
+    # this happens when, for example, someone "load"s the right files
+    # in the Sage notebook
+    pass
+
+from sage.graphs.graph import Graph
+
+
+def random_tree_benchmark(n, seed):
+    """
+    Return a random tree on `n` vertices made from a random Prüfer
+    sequence.
+
+    :param n: the number of vertices
+    :param seed: the seed for the random number generator
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_benchmark import random_tree_benchmark
+        sage: t = random_tree_benchmark(10, seed=1)
+        sage: t.is_tree(), t.order()
+        (True, 10)
+        sage: t == random_tree_benchmark(10, seed=1)
+        True
+    """
+    if n <= 2:
+        g = Graph(n)
+        if n == 2:
+            g.add_edge(0, 1)
+        return g
+    rng = random.Random(seed)
+    code = [rng.randrange(n) for i in range(n-2)]
+    degree = [1]*n
+    for v in code:
+        degree[v] += 1
+    edges = []
+    for v in code:
+        leaf = min(u for u in range(n) if degree[u] == 1)
+        edges.append((leaf, v))
+        degree[leaf] -= 1
+        degree[v] -= 1
+    u, v = [w for w in range(n) if degree[w] == 1]
+    edges.append((u, v))
+    g = Graph(n)
+    g.add_edges(edges)
+    return g
+
+
+def random_gnp_benchmark(n, p, seed):
+    """
+    Return a random graph on `n` vertices in which each edge is present
+    with probability `p`.
+
+    :param n: the number of vertices
+    :param p: the probability of each edge
+    :param seed: the seed for the random number generator
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_benchmark import random_gnp_benchmark
+        sage: g = random_gnp_benchmark(8, 0.5, seed=2)
+        sage: g == random_gnp_benchmark(8, 0.5, seed=2)
+        True
+        sage: random_gnp_benchmark(8, 1, seed=2) == graphs.CompleteGraph(8)
+        True
+    """
+    rng = random.Random(seed)
+    g = Graph(n)
+    g.add_edges([(u, v) for u in range(n) for v in range(u+1, n)
+                 if rng.random() < p])
+    return g
+
+
+def benchmark_corpora(seed=0):
+    """
+    Return the graphs that are benchmarked.
+
+    The corpora are:
+
+    - 'atlas' -- the 1253 graphs of the Atlas of Graphs
+    - 'named' -- the Petersen and Heawood graphs, the 3- and
+      4-dimensional hypercubes, and square grids
+    - 'random trees' -- 5 random trees each on 8, 12, 16, and 20
+      vertices
+    - 'random gnp' -- 5 random graphs each on 8, 10, and 12 vertices
+      with edge probabilities 0.3 and 0.6
+
+    :param seed: the seed for the random corpora
+
+    :return: a dictionary mapping the name of each corpus to a list of
+        pairs ``(name, graph)``; the vertices of each graph are
+        `0, \\ldots, n-1`
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_benchmark import benchmark_corpora
+        sage: corpora = benchmark_corpora()
+        sage: sorted((name, len(graphs)) for name, graphs in corpora.items())
+        [('atlas', 1253), ('named', 7), ('random gnp', 30), ('random trees', 20)]
+    """
+    from sage.graphs.graph_generators import graphs
+    corpora = {}
+    corpora['atlas'] = [('atlas %d' % i, g) for i, g in enumerate(atlas_graphs)]
+
+    named = [('Petersen', graphs.PetersenGraph()),
+             ('Heawood', graphs.HeawoodGraph()),
+             ('hypercube 3', graphs.CubeGraph(3)),
+             ('hypercube 4', graphs.CubeGraph(4)),
+             ('grid 3x3', graphs.GridGraph([3, 3])),
+             ('grid 4x4', graphs.GridGraph([4, 4])),
+             ('grid 3x5', graphs.GridGraph([3, 5]))]
+    for name, g in named:
+        g.relabel()
+    corpora['named'] = named
+
+    # Each random graph gets its own seed, so that adding graphs to a
+    # corpus does not change the graphs already in it
+    rng = random.Random(seed)
+    corpora['random trees'] = [('tree %d #%d' % (n, i),
+                                random_tree_benchmark(n, rng.randrange(2**30)))
+                               for n in [8, 12, 16, 20] for i in range(5)]
+    corpora['random gnp'] = [('gnp %d %s #%d' % (n, p, i),
+                              random_gnp_benchmark(n, p, rng.randrange(2**30)))
+                             for n in [8, 10, 12] for p in [0.3, 0.6]
+                             for i in range(5)]
+    return corpora
+
+
+def _minrank_bounds_cold(g):
+    """
+    Run :func:`minrank_bounds` without the results cached from
+    earlier graphs.
+    """
+    minrank_cache.clear()
+    return minrank_bounds(g)
+
+
+# For each engine: the function to time, the smallest and largest
+# orders of the graphs it is run on, and a function that picks the
+# answer out of its result.  The largest orders keep the exponential
+# engines to a few minutes for the whole suite.  The engines are
+# looked up when they are called, so that this module can be loaded
+# before the others in the Sage notebook.
+benchmark_engines = {
+    'find_Z': (lambda g: find_Z(g), 1, 10, int),
+    'zero_forcing_set_bruteforce_cython': (
+        lambda g: zero_forcing_set_bruteforce_cython(g), 1, 16,
+        lambda r: int(r[0])),
+    'zero_forcing_set_wavefront': (lambda g: zero_forcing_set_wavefront(g),
+                                   1, 20, lambda r: int(r[0])),
+    'Zq_compute': (lambda g: Zq_compute(g, 1), 2, 12, int),
+    'Zqhat': (lambda g: Zqhat(g, 1), 2, 8, int),
+    'edge_clique_cover_minimum': (lambda g: edge_clique_cover_minimum(g),
+                                  1, 12, len),
+    'minrank_bounds': (_minrank_bounds_cold, 1, 12,
+                       lambda r: (int(r[0]), int(r[1]))),
+}
+
+
+def run_benchmarks(engines=None, corpora=None, repeat=3, seed=0, verbose=False):
+    """
+    Time the engines on the corpora.
+
+    Each engine is run ``repeat`` times on each graph of a corpus
+    whose order is in the range for that engine (see
+    ``benchmark_engines``), and the fastest time for each graph is
+    kept.
+
+    :param engines: a list of names of engines; if None, all engines
+    :param corpora: a list of names of corpora; if None, all corpora
+        (see :func:`benchmark_corpora`)
+    :param repeat: the number of times each engine is run on each
+        graph
+    :param seed: the seed for the random corpora
+    :param verbose: if True, print each engine and corpus as it is
+        timed
+
+    :return: a dictionary with the keys ``'meta'`` (information about
+        the run) and ``'results'``.  ``results[engine][corpus]`` is a
+        dictionary giving the number of graphs, the total and largest
+        of the times for the graphs, and a digest of the answers.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_benchmark import run_benchmarks
+        sage: r = run_benchmarks(engines=['find_Z'], corpora=['named'], repeat=1)
+        sage: r['results']['find_Z']['named']['graphs']
+        3
+    """
+    import platform
+    from sage.version import version
+    all_corpora = benchmark_corpora(seed=seed)
+    if engines is None:
+        engines = sorted(benchmark_engines)
+    if corpora is None:
+        corpora = sorted(all_corpora)
+
+    results = {}
+    for engine in engines:
+        function, min_order, max_order, answer = benchmark_engines[engine]
+        results[engine] = {}
+        for corpus in corpora:
+            if verbose:
+                print "timing %s on %s" % (engine, corpus)
+            times = []
+            answers = []
+            for name, g in all_corpora[corpus]:
+                if not min_order <= g.order() <= max_order:
+                    continue
+                best = None
+                for i in range(repeat):
+                    start = time.time()
+                    result = function(g)
+                    seconds = time.time() - start
+                    if best is None or seconds < best:
+                        best = seconds
+                times.append(best)
+                answers.append((name, answer(result)))
+            results[engine][corpus] = {
+                'graphs': len(times),
+                'seconds': sum(times),
+                'max_seconds': max(times) if times else 0,
+                'digest': hashlib.md5(repr(answers)).hexdigest()}
+    meta = {'sage': version, 'python': platform.python_version(),
+            'machine': platform.machine(), 'seed': seed,
+            'repeat': repeat, 'date': time.strftime('%Y-%m-%d %H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare_benchmarks(results, baseline, tolerance=0.25, min_seconds=0.05):
+    """
+    Compare benchmark results with a baseline.
+
+    :param results: the results of :func:`run_benchmarks`
+    :param baseline: earlier results of :func:`run_benchmarks`
+    :param tolerance: an engine is flagged as slower on a corpus if it
+        took more than ``1+tolerance`` times as long as in the baseline
+    :param min_seconds: differences of less than this many seconds are
+        not flagged, since they are mostly noise
+
+    :return: a list of strings, one for each regression.  A change in
+        the answers of an engine on a corpus is always flagged.  A
+        slowdown is given as a percentage, or in seconds if the
+        baseline took no measurable time.
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_benchmark import compare_benchmarks
+        sage: old = {'results': {'find_Z': {'atlas': {'graphs': 10, 'seconds': 1.0, 'max_seconds': 0.5, 'digest': 'a'}}}}
+        sage: new = {'results': {'find_Z': {'atlas': {'graphs': 10, 'seconds': 2.0, 'max_seconds': 0.5, 'digest': 'a'}}}}
+        sage: compare_benchmarks(new, old)
+        ['find_Z on atlas: 2.000s, was 1.000s (+100%)']
+        sage: compare_benchmarks(old, new)
+        []
+        sage: zero = {'results': {'find_Z': {'atlas': {'graphs': 10, 'seconds': 0.0, 'max_seconds': 0.0, 'digest': 'a'}}}}
+        sage: compare_benchmarks(new, zero)
+        ['find_Z on atlas: 2.000s, was 0.000s (+2.000s)']
+    """
+    regressions = []
+    for engine, corpora in sorted(results['results'].items()):
+        for corpus, new in sorted(corpora.items()):
+            try:
+                old = baseline['results'][engine][corpus]
+            except KeyError:
+                continue
+            if old['graphs'] != new['graphs'] or old['digest'] != new['digest']:
+                regressions.append('%s on %s: answers changed' % (engine, corpus))
+            elif (new['seconds'] > (1+tolerance)*old['seconds']
+                  and new['seconds'] - old['seconds'] > min_seconds):
+                if old['seconds'] > 0:
+                    change = '%+d%%' % round(100*(new['seconds']/old['seconds']-1))
+                else:
+                    # no ratio to a baseline that took no measurable time
+                    change = '%+.3fs' % (new['seconds'] - old['seconds'])
+                regressions.append('%s on %s: %.3fs, was %.3fs (%s)'
+                                   % (engine, corpus, new['seconds'], old['seconds'],
+                                      change))
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description='Time the zero forcing and minimum rank engines on fixed corpora of graphs.')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--save-baseline', dest='save_baseline',
+                        help='write the results to this JSON file as a new baseline')
+    parser.add_argument('--baseline', help='compare the results with this JSON file')
+    parser.add_argument('--engine', dest='engines', action='append', default=None,
+                        choices=sorted(benchmark_engines),
+                        help='an engine to time; may be given more than once (default: all)')
+    parser.add_argument('--corpus', dest='corpora', action='append', default=None,
+                        choices=['atlas', 'named', 'random trees', 'random gnp'],
+                        help='a corpus to use; may be given more than once (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs for each graph; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the random corpora')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='flag engines more than this fraction slower than the baseline')
+    args = parser.parse_args()
+
+    results = run_benchmarks(engines=args.engines, corpora=args.corpora,
+                             repeat=args.repeat, seed=args.seed, verbose=True)
+    for filename in (args.output, args.save_baseline):
+        if filename is not None:
+            with open(filename, 'w') as f:
+                json.dump(results, f, indent=1, sort_keys=True)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_benchmarks(results, baseline,
+                                         tolerance=args.tolerance)
+        for regression in regressions:
+            print regression
+        if regressions:
+            sys.exit(1)
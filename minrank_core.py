@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+"""
+Zero forcing and minimum rank computations without Sage
+
+This module contains versions of the core computations of this
+library that only need networkx and NumPy, so that worker processes
+that use them start quickly.  Vertex sets are Python integers used as
+bitmasks: vertex `i` (in the order of :func:`core_graph_masks`) is
+bit `i`.
+
+- :func:`core_zero_forcing_closure` and
+  :func:`core_zero_forcing_closure_looped` -- the color change rules
+  of ``push_zeros`` and ``push_zeros_looped`` in ``Zq_c.pyx``
+- :func:`core_zero_forcing_wavefront` -- the search of
+  ``zero_forcing_set_wavefront``
+- :func:`core_Zq` -- the dynamic program of ``Zq_bitset``
+- :func:`core_cheap_bounds` -- the bounds of ``min_rank_by_bounds``
+  that do not need Sage
+- ``InertiaSet`` -- from ``inertia.py``, which does not need Sage
+  except for plotting
+
+Canonical labels, planarity, and the other bounds still need Sage.
+The functions are prefixed with ``core_`` so that they do not clash
+with the Sage versions when the files are loaded into the Sage
+notebook.
+
+EXAMPLES::
+
+    >>> import networkx
+    >>> from minrank_core import core_zero_forcing_wavefront, core_Zq
+    >>> core_zero_forcing_wavefront(networkx.petersen_graph())[0]
+    5
+    >>> core_Zq(networkx.cycle_graph(5), 1)
+    2
+"""
+
+#######################################################################
+#
+# Copyright (C) 2011 Steve Butler, Jason Grout.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#######################################################################
+
+from itertools import combinations
+
+import numpy
+import networkx
+
+try:
+    from inertia import InertiaSet
+except ImportError:
+    # assume everything is in the global space
+    # this happens when, for example, someone "load"s the right files
+    # in the Sage notebook
+    pass
+
+
+def core_graph_masks(graph):
+    """
+    Return the vertices of a graph and the bitmasks of their
+    neighborhoods.
+
+    :param graph: a networkx graph, a dictionary mapping each vertex
+        to its neighbors, or a square (NumPy) matrix whose nonzero
+        off-diagonal entries are the edges
+
+    :return: a pair ``(vertices, neighbors)``, where ``neighbors[i]``
+        is the bitmask of the neighbors of ``vertices[i]``.  For a
+        matrix, the vertices are ``0, ..., n-1``.
+
+    EXAMPLES::
+
+        >>> from minrank_core import core_graph_masks
+        >>> core_graph_masks({'a': ['b'], 'b': ['a', 'c'], 'c': ['b']})[1]
+        [2, 5, 2]
+        >>> core_graph_masks([[1, 1, 0], [1, 0, 1], [0, 1, 0]])
+        ([0, 1, 2], [2, 5, 2])
+    """
+    if isinstance(graph, networkx.Graph):
+        vertices = list(graph.nodes())
+        adjacency = dict((v, graph[v]) for v in vertices)
+    elif isinstance(graph, dict):
+        vertices = sorted(graph)
+        adjacency = graph
+    else:
+        matrix = numpy.asarray(graph)
+        vertices = list(range(matrix.shape[0]))
+        rows, columns = numpy.nonzero(matrix)
+        adjacency = dict((v, []) for v in vertices)
+        for i, j in zip(rows, columns):
+            adjacency[int(i)].append(int(j))
+    index = dict((v, i) for i, v in enumerate(vertices))
+    neighbors = [0]*len(vertices)
+    for v in vertices:
+        for w in adjacency[v]:
+            if w != v:
+                # make the neighborhoods symmetric
+                neighbors[index[v]] |= 1 << index[w]
+                neighbors[index[w]] |= 1 << index[v]
+    return vertices, neighbors
+
+
+def core_bits(mask):
+    """
+    Return the list of the bits set in ``mask``.
+
+    EXAMPLES::
+
+        >>> from minrank_core import core_bits
+        >>> core_bits(0b10110)
+        [1, 2, 4]
+    """
+    bits = []
+    i = 0
+    while mask:
+        if mask & 1:
+            bits.append(i)
+        mask >>= 1
+        i += 1
+    return bits
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def core_zero_forcing_closure(neighbors, filled, subgraph=None):
+    """
+    Run zero forcing as much as possible.
+
+    This is ``push_zeros`` from ``Zq_c.pyx``: vertices outside of
+    ``subgraph`` count as filled, and a filled vertex with exactly one
+    unfilled neighbor forces that neighbor.
+
+    :param neighbors: the neighborhood bitmasks
+    :param filled: the bitmask of the initially filled vertices
+    :param subgraph: the bitmask of the subgraph we are forcing on; if
+        None, the whole graph
+
+    :return: the bitmask of the filled vertices after forcing,
+        including all of ``filled``
+
+    EXAMPLES::
+
+        >>> from minrank_core import core_graph_masks, core_zero_forcing_closure
+        >>> import networkx
+        >>> vertices, neighbors = core_graph_masks(networkx.path_graph(5))
+        >>> core_zero_forcing_closure(neighbors, 1)
+        31
+        >>> core_zero_forcing_closure(neighbors, 4)
+        4
+    """
+    n = len(neighbors)
+    if subgraph is None:
+        subgraph = (1 << n) - 1
+    unfilled = subgraph & ~filled
+    active = filled
+    changed = True
+    while changed:
+        changed = False
+        for v in core_bits(active):
+            unfilled_neighbors = neighbors[v] & unfilled
+            if unfilled_neighbors == 0:
+                active &= ~(1 << v)
+            elif unfilled_neighbors & (unfilled_neighbors-1) == 0:
+                # exactly one unfilled neighbor, so push to it
+                unfilled &= ~unfilled_neighbors
+                active = (active | unfilled_neighbors) & ~(1 << v)
+                changed = True
+    return filled | (subgraph & ~unfilled)
+
+
+def core_zero_forcing_closure_looped(neighbors, filled, looped, unlooped, subgraph=None):
+    """
+    Run loop zero forcing as much as possible.
+
+    This is ``push_zeros_looped`` from ``Zq_c.pyx``: a vertex that is
+    filled or unlooped and has exactly one unfilled neighbor forces
+    that neighbor, and an unfilled looped vertex with no unfilled
+    neighbors is filled.  Vertices in neither ``looped`` nor
+    ``unlooped`` only follow the usual rule.
+
+    :param neighbors: the neighborhood bitmasks
+    :param filled: the bitmask of the initially filled vertices
+    :param looped: the bitmask of the looped vertices
+    :param unlooped: the bitmask of the unlooped vertices
+    :param subgraph: the bitmask of the subgraph we are forcing on; if
+        None, the whole graph
+
+    :return: the bitmask of the filled vertices after forcing,
+        including all of ``filled``
+
+    EXAMPLES::
+
+        >>> from minrank_core import core_graph_masks, core_zero_forcing_closure_looped
+        >>> import networkx
+        >>> vertices, neighbors = core_graph_masks(networkx.path_graph(3))
+        >>> core_zero_forcing_closure_looped(neighbors, 0, looped=0, unlooped=1)
+        2
+        >>> core_zero_forcing_closure_looped(neighbors, 0, looped=7, unlooped=0)
+        0
+    """
+    n = len(neighbors)
+    if subgraph is None:
+        subgraph = (1 << n) - 1
+    unfilled = subgraph & ~filled
+    # unlooped vertices can push before they are filled
+    active = filled | unlooped
+    changed = True
+    while changed:
+        changed = False
+        for v in core_bits(active):
+            unfilled_neighbors = neighbors[v] & unfilled
+            if unfilled_neighbors == 0:
+                active &= ~(1 << v)
+            elif unfilled_neighbors & (unfilled_neighbors-1) == 0:
+                unfilled &= ~unfilled_neighbors
+                active = (active | unfilled_neighbors) & ~(1 << v)
+                changed = True
+        for v in core_bits(unfilled & looped):
+            if neighbors[v] & unfilled == 0:
+                # v dies alone
+                unfilled &= ~(1 << v)
+                changed = True
+    return filled | (subgraph & ~unfilled)
+
+
+def core_connected_components(neighbors, subgraph):
+    """
+    Return the bitmasks of the connected components of the subgraph
+    induced by the bitmask ``subgraph``.
+
+    EXAMPLES::
+
+        >>> from minrank_core import core_graph_masks, core_connected_components
+        >>> import networkx
+        >>> vertices, neighbors = core_graph_masks(networkx.path_graph(5))
+        >>> sorted(core_connected_components(neighbors, 0b11011))
+        [3, 24]
+    """
+    components = []
+    remaining = subgraph
+    while remaining:
+        component = remaining & -remaining
+        frontier = component
+        while frontier:
+            reached = 0
+            for v in core_bits(frontier):
+                reached |= neighbors[v]
+            frontier = reached & subgraph & ~component
+            component |= frontier
+        components.append(component)
+        remaining &= ~component
+    return components
+
+
+def core_zero_forcing_wavefront(graph):
+    """
+    Calculate the zero forcing number and a minimum zero forcing set.
+
+    This is the algorithm of ``zero_forcing_set_wavefront``.
+
+    :param graph: a graph, as for :func:`core_graph_masks`
+
+    :return: the zero forcing number, a minimum zero forcing set, and
+        the number of closures that were stored
+
+    EXAMPLES::
+
+        >>> import networkx
+        >>> from minrank_core import core_zero_forcing_wavefront
+        >>> core_zero_forcing_wavefront(networkx.path_graph(4))[:2]
+        (1, [0])
+        >>> core_zero_forcing_wavefront(networkx.complete_graph(5))[0]
+        4
+    """
+    vertices, neighbors = core_graph_masks(graph)
+    n = len(vertices)
+    if n == 0:
+        return 0, [], 0
+    all_vertices = (1 << n) - 1
+
+    # closures maps the unfilled set of a closure to the initial set
+    # that gives it
+    closures = {all_vertices: 0}
+    minimum_degree = min(_popcount(N) for N in neighbors)
+    for budget in range(minimum_degree, n+1):
+        for unfilled, initial in list(closures.items()):
+            can_afford = budget - _popcount(initial)
+            for v in range(n):
+                unfilled_neighbors = neighbors[v] & unfilled
+                cost = max(1, _popcount(unfilled_neighbors))
+                v_unfilled = unfilled >> v & 1
+                if not v_unfilled:
+                    cost -= 1
+                    if cost == 0:
+                        continue
+                if cost <= can_afford:
+                    new_initial = initial | unfilled_neighbors
+                    if v_unfilled:
+                        new_initial |= 1 << v
+                    new_filled = core_zero_forcing_closure(
+                        neighbors, (all_vertices & ~unfilled) | new_initial)
+                    new_unfilled = all_vertices & ~new_filled
+                    # one unfilled neighbor is forced by v, so it does
+                    # not need to be in the initial set
+                    if unfilled_neighbors:
+                        new_initial &= ~(unfilled_neighbors & -unfilled_neighbors)
+                    if new_unfilled == 0:
+                        zfs = [vertices[i] for i in core_bits(new_initial)]
+                        return len(zfs), zfs, len(closures)
+                    if new_unfilled not in closures:
+                        closures[new_unfilled] = new_initial
+
+
+def core_Zq(graph, q, looped=None, unlooped=None):
+    """
+    Calculate `Z_q` of a graph.
+
+    This is the dynamic program of ``Zq_bitset``, with
+    :func:`core_zero_forcing_closure` as the color change rule, or
+    :func:`core_zero_forcing_closure_looped` if ``looped`` or
+    ``unlooped`` is given.
+
+    :param graph: a graph with at least 2 vertices, as for
+        :func:`core_graph_masks`
+    :param q: the `q` of `Z_q`
+    :param looped: the list of looped vertices, or None
+    :param unlooped: the list of unlooped vertices, or None
+
+    EXAMPLES::
+
+        >>> import networkx
+        >>> from minrank_core import core_Zq
+        >>> core_Zq(networkx.petersen_graph(), 0)
+        4
+        >>> core_Zq(networkx.star_graph(4), 0)
+        1
+        >>> core_Zq(networkx.star_graph(4), 1)
+        3
+    """
+    vertices, neighbors = core_graph_masks(graph)
+    n = len(vertices)
+    if n < 2:
+        raise ValueError("G needs to have 2 or more vertices")
+    V = (1 << n) - 1
+
+    if looped is None and unlooped is None:
+        def closure(filled, subgraph=V):
+            return core_zero_forcing_closure(neighbors, filled, subgraph)
+    else:
+        index = dict((v, i) for i, v in enumerate(vertices))
+        looped_mask = sum(1 << index[v] for v in (looped or []))
+        unlooped_mask = sum(1 << index[v] for v in (unlooped or []))
+        def closure(filled, subgraph=V):
+            return core_zero_forcing_closure_looped(neighbors, filled, looped_mask,
+                                                    unlooped_mask, subgraph)
+
+    cost = {V: 0}
+    for sizeZ in range(n-1, -1, -1):
+        for Z in combinations(range(n), sizeZ):
+            Z = sum(1 << i for i in Z)
+            if closure(Z) != Z:
+                # can push, so skip
+                continue
+            b = n
+            c = n
+            cost[Z] = n
+            H = core_connected_components(neighbors, V & ~Z)
+            for J in combinations(H, q+1):
+                bb = -1
+                for r in range(1, len(J)+1):
+                    for K in combinations(J, r):
+                        subgraph = Z
+                        for s in K:
+                            subgraph |= s
+                        closed_Z = closure(closure(Z, subgraph))
+                        bb = max(bb, cost[closed_Z])
+                b = min(b, bb)
+            for v in core_bits(V & ~Z):
+                c = min(c, cost[closure(Z | 1 << v)] + 1)
+            cost[Z] = min(b, c)
+    return cost[closure(0)]
+
+
+def core_cheap_bounds(graph):
+    """
+    Return the bounds of ``min_rank_by_bounds`` that can be computed
+    without Sage.
+
+    These are the 'order' and 'zero forcing fast' bounds (with the
+    tree upper bound), and, for connected graphs, the 'not path' and
+    'diameter' bounds.  They have the same names as in
+    ``min_rank_by_bounds``.
+
+    :param graph: a graph, as for :func:`core_graph_masks`
+
+    :return: a pair of dictionaries; the lower and upper bounds
+
+    EXAMPLES::
+
+        >>> import networkx
+        >>> from minrank_core import core_cheap_bounds
+        >>> lower, upper = core_cheap_bounds(networkx.path_graph(4))
+        >>> sorted(lower.items()), sorted(upper.items())
+        ([('diameter', 3), ('zero forcing fast', 3)], [('order', 3), ('zero forcing fast (tree)', 3)])
+        >>> lower, upper = core_cheap_bounds(networkx.petersen_graph())
+        >>> sorted(lower.items()), sorted(upper.items())
+        ([('diameter', 2), ('zero forcing fast', 5)], [('not path', 8), ('order', 9)])
+    """
+    if not isinstance(graph, networkx.Graph):
+        vertices, neighbors = core_graph_masks(graph)
+        g = networkx.Graph()
+        g.add_nodes_from(range(len(vertices)))
+        g.add_edges_from((i, j) for i in range(len(vertices))
+                         for j in core_bits(neighbors[i]) if i < j)
+        graph = g
+    order = graph.number_of_nodes()
+    lower_bound = {}
+    upper_bound = {}
+    if order == 0:
+        return lower_bound, upper_bound
+
+    upper_bound['order'] = order - 1
+
+    lower_bound['zero forcing fast'] = order - core_zero_forcing_wavefront(graph)[0]
+    if networkx.is_tree(graph):
+        upper_bound['zero forcing fast (tree)'] = lower_bound['zero forcing fast']
+
+    if networkx.is_connected(graph):
+        diameter = networkx.diameter(graph)
+        lower_bound['diameter'] = diameter
+        if diameter < order - 1:
+            upper_bound['not path'] = order - 2
+    return lower_bound, upper_bound
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Differential testing of the zero forcing engines
+
+This module runs several engines that compute the zero forcing
+number on the same graphs and reports every graph on which they
+disagree, with its graph6 string so that it can be reproduced.  For
+graphs on at most 7 vertices, each answer is also checked against the
+table of minimum ranks: since `mr(G) \\geq |G| - Z(G)`, a zero forcing
+number that is too small is caught even if every engine agrees.  The
+time taken by each engine is recorded in the same run, so speed and
+correctness are measured on the same input.
+
+From the command line, run::
+
+    sage -python minrank_differential.py            # the atlas graphs
+    sage -python minrank_differential.py graphs.g6  # graphs from a file
+
+The script exits with status 1 if the engines disagree, if an answer
+violates the minimum rank, or if an engine fails on some graph.
+"""
+
+#######################################################################
+#
+# Copyright (C) 2011 Jason Grout.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#######################################################################
+
+import time
+
+try:
+    from minrank import (atlas_graphs, get_mr_from_list,
+                         zero_forcing_set_bruteforce)
+    from minrank_batch import graph6_lines
+    from zero_forcing_64 import zero_forcing_set_bruteforce_cython
+    from zero_forcing_wavefront import zero_forcing_set_wavefront
+    from Zq import zero_forcing_sets
+except ImportError:
+    # assume everything is in the global space
+    # this happens when, for example, someone "load"s the right files
+    # in the Sage notebook
+    pass
+
+
+def _zero_forcing_sets_Z(graph):
+    """
+    Return the zero forcing number from :func:`zero_forcing_sets`,
+    which needs the vertices to be `0, \\ldots, n-1`.
+    """
+    g = graph.copy()
+    g.relabel()
+    return zero_forcing_sets(g)[0]
+
+
+# Each engine takes a graph and returns its zero forcing number.  The
+# engines are looked up when they are called, so that this module can
+# be loaded before the others in the Sage notebook.
+differential_engines = {
+    'bruteforce': lambda g: len(zero_forcing_set_bruteforce(g)),
+    'bruteforce_cython': lambda g: zero_forcing_set_bruteforce_cython(g)[0],
+    'wavefront': lambda g: zero_forcing_set_wavefront(g)[0],
+    'zero_forcing_sets': _zero_forcing_sets_Z,
+}
+
+
+def differential_test(graphs, engines=None, verbose=False):
+    """
+    Run the zero forcing engines on each graph and compare the
+    answers.
+
+    An engine that raises an exception on a graph is recorded as an
+    error for that graph and does not take part in the comparison.
+    Graphs without vertices are skipped.
+
+    :param graphs: an iterable of graphs
+    :param engines: a list of names of engines in
+        ``differential_engines``; if None, all engines
+    :param verbose: if True, print each problem as it is found
+
+    :return: a dictionary with the keys
+
+    - ``'graphs'`` -- the number of graphs tested
+    - ``'disagreements'`` -- a list of pairs ``(graph6, answers)``,
+      where ``answers`` maps each engine to its zero forcing number
+    - ``'min_rank_violations'`` -- a list of tuples ``(graph6, engine,
+      Z, mr)`` for answers ``Z`` with ``order - Z > mr``
+    - ``'errors'`` -- a list of tuples ``(graph6, engine, error)``
+    - ``'throughput'`` -- for each engine, a dictionary giving the
+      number of graphs it finished, the total seconds, and graphs per
+      second
+
+    EXAMPLES::
+
+        sage: from sage.graphs.minrank_differential import differential_test
+        sage: r = differential_test([graphs.PathGraph(4), graphs.PetersenGraph()],
+        ....:                       engines=['bruteforce', 'wavefront', 'zero_forcing_sets'])
+        sage: r['graphs'], r['disagreements'], r['min_rank_violations'], r['errors']
+        (2, [], [], [])
+        sage: sorted(r['throughput']['wavefront'].keys())
+        ['graphs', 'graphs_per_second', 'seconds']
+        sage: r['throughput']['zero_forcing_sets']['graphs']
+        2
+    """
+    if engines is None:
+        engines = sorted(differential_engines)
+    report = {'graphs': 0, 'disagreements': [], 'min_rank_violations': [],
+              'errors': []}
+    seconds = dict((engine, 0.0) for engine in engines)
+    finished = dict((engine, 0) for engine in engines)
+
+    for graph in graphs:
+        order = graph.order()
+        if order == 0:
+            continue
+        report['graphs'] += 1
+        graph6 = graph.graph6_string()
+        answers = {}
+        for engine in engines:
+            start = time.time()
+            try:
+                Z = differential_engines[engine](graph)
+            except Exception as e:
+                problem = (graph6, engine, '%s: %s' % (type(e).__name__, e))
+                report['errors'].append(problem)
+                if verbose:
+                    print "error: %s %s %s" % problem
+                continue
+            seconds[engine] += time.time() - start
+            finished[engine] += 1
+            answers[engine] = int(Z)
+
+        if len(set(answers.values())) > 1:
+            report['disagreements'].append((graph6, answers))
+            if verbose:
+                print "disagreement: %s %s" % (graph6, answers)
+
+        mr = get_mr_from_list(graph)
+        if mr is not False:
+            for engine, Z in sorted(answers.items()):
+                if order - Z > mr:
+                    problem = (graph6, engine, Z, mr)
+                    report['min_rank_violations'].append(problem)
+                    if verbose:
+                        print "min rank violation: %s %s Z=%s mr=%s" % problem
+
+    report['throughput'] = dict(
+        (engine, {'graphs': finished[engine], 'seconds': seconds[engine],
+                  'graphs_per_second': finished[engine]/seconds[engine]
+                                       if seconds[engine] > 0 else None})
+        for engine in engines)
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description='Compare the zero forcing engines on the atlas graphs or on the graphs in a graph6 or sparse6 file.')
+    parser.add_argument('infile', nargs='?', default=None,
+                        help='graph6 or sparse6 file (default: the atlas graphs)')
+    parser.add_argument('--engine', dest='engines', action='append', default=None,
+                        choices=sorted(differential_engines),
+                        help='an engine to run; may be given more than once (default: all)')
+    args = parser.parse_args()
+
+    if args.infile is None:
+        graphs = atlas_graphs
+    else:
+        from sage.graphs.graph import Graph
+        graphs = (Graph(line) for offset, next_offset, line
+                  in graph6_lines(open(args.infile, 'rb')))
+    report = differential_test(graphs, engines=args.engines, verbose=True)
+
+    print "%d graphs: %d disagreements, %d min rank violations, %d errors" \
+        % (report['graphs'], len(report['disagreements']),
+           len(report['min_rank_violations']), len(report['errors']))
+    for engine, t in sorted(report['throughput'].items()):
+        print "%s: %d graphs in %.3fs" % (engine, t['graphs'], t['seconds'])
+    if report['disagreements'] or report['min_rank_violations'] or report['errors']:
+        sys.exit(1)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+A persistent store of graph parameters
+
+The zero forcing numbers, `Z_q` values, and minimum rank bounds
+computed by this library only depend on the isomorphism class of the
+graph.  A :class:`ResultStore` keeps them in an SQLite database, keyed
+by the graph6 string of the canonical label of the graph, the name of
+the function, and its parameters, so that they are computed once
+across runs.
+
+The store is off by default.  Turn it on with
+:func:`set_result_store`; then :func:`minrank_bounds`,
+:func:`Zq_compute`, :func:`Zqhat`, and :func:`inertia_set` look up
+their results in the store before computing them, and save what they
+compute.  The database is opened in write-ahead log mode, so several
+processes (for example, the workers of :func:`minrank_bounds_batch`)
+can read and write it at the same time.
+
+EXAMPLES::
+
+    sage: from sage.graphs.result_store import set_result_store, get_result_store
+    sage: from sage.graphs.minrank import minrank_bounds, minrank_cache
+    sage: set_result_store(tmp_filename())
+    sage: minrank_cache.clear()
+    sage: minrank_bounds(graphs.PetersenGraph())
+    (5, 6)
+    sage: minrank_cache.clear()
+    sage: minrank_bounds(graphs.PetersenGraph())
+    (5, 6)
+    sage: get_result_store().info()['minrank_bounds']
+    {'hit rate': 0.5, 'hits': 1, 'misses': 1}
+    sage: set_result_store(None)
+"""
+
+#######################################################################
+#
+# Copyright (C) 2011 Jason Grout.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#######################################################################
+
+import os
+import sqlite3
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+class ResultStore(object):
+    """
+    Results of functions of graphs, stored in an SQLite database.
+
+    Each process that uses the store opens its own connection to the
+    database, so a store can be made before a pool of processes is
+    started and used in all of them.  The number of lookups that found
+    (``hits``) and did not find (``misses``) a result are counted for
+    each function, in each process.
+
+    :param filename: the name of the database file; it is made if it
+        does not exist
+    :param timeout: the number of seconds to wait for another process
+        that is writing to the database
+
+    EXAMPLES::
+
+        sage: from sage.graphs.result_store import ResultStore
+        sage: store = ResultStore(tmp_filename())
+        sage: store.get('Bw', 'Z') is None
+        True
+        sage: store.set('Bw', 'Z', (), 1)
+        sage: store.get('Bw', 'Z')
+        1
+        sage: store.set('Bw', 'Zq', (1,), 2)
+        sage: store.get('Bw', 'Zq', (1,)), store.get('Bw', 'Zq', (2,))
+        (2, None)
+        sage: len(store)
+        2
+        sage: store.info()
+        {'Z': {'hit rate': 0.5, 'hits': 1, 'misses': 1},
+         'Zq': {'hit rate': 0.5, 'hits': 1, 'misses': 1}}
+    """
+    def __init__(self, filename, timeout=30.0):
+        self.filename = filename
+        self.timeout = timeout
+        self.hits = {}
+        self.misses = {}
+        self._connection = None
+        self._pid = None
+        self._connect()
+
+    def __getstate__(self):
+        # connections can not be pickled; the new process reconnects
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        return state
+
+    def __repr__(self):
+        return "Result store in %s"%self.filename
+
+    def _connect(self):
+        """
+        Return the connection to the database for this process.
+
+        A connection is not shared with processes forked after it was
+        opened, so each process opens its own.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.filename, timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA busy_timeout=%d"%int(1000*self.timeout))
+            connection.execute("""CREATE TABLE IF NOT EXISTS results (
+                                  graph6 TEXT NOT NULL,
+                                  function TEXT NOT NULL,
+                                  params TEXT NOT NULL,
+                                  value BLOB NOT NULL,
+                                  PRIMARY KEY (graph6, function, params))""")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, graph6, function, params=(), default=None):
+        """
+        Return the result stored for a function of a graph, or
+        ``default`` if there is none.
+
+        :param graph6: the graph6 string of the canonical label of the
+            graph
+        :param function: the name of the function
+        :param params: a tuple of the other parameters of the
+            function; its ``repr`` is stored
+        """
+        row = self._connect().execute(
+            "SELECT value FROM results WHERE graph6=? AND function=? AND params=?",
+            (graph6, function, repr(params))).fetchone()
+        if row is None:
+            self.misses[function] = self.misses.get(function, 0) + 1
+            return default
+        self.hits[function] = self.hits.get(function, 0) + 1
+        return pickle.loads(bytes(row[0]))
+
+    def set(self, graph6, function, params, value):
+        """
+        Store ``value`` as the result of a function of a graph,
+        replacing any result already stored.
+        """
+        blob = sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self._connect().execute(
+            "INSERT OR REPLACE INTO results (graph6, function, params, value) VALUES (?, ?, ?, ?)",
+            (graph6, function, repr(params), blob))
+
+    def clear(self):
+        """
+        Remove all results and reset the hit and miss counts.
+        """
+        self._connect().execute("DELETE FROM results")
+        self.hits.clear()
+        self.misses.clear()
+
+    def info(self):
+        """
+        Return a dictionary giving, for each function looked up in
+        this process, the number of hits and misses and the hit rate.
+        """
+        info = {}
+        for function in set(self.hits).union(self.misses):
+            hits = self.hits.get(function, 0)
+            misses = self.misses.get(function, 0)
+            info[function] = {'hits': hits, 'misses': misses,
+                              'hit rate': float(hits)/(hits + misses)}
+        return info
+
+# The store used by minrank_bounds, Zq_compute, Zqhat, and inertia_set,
+# or None if results are not stored.
+_result_store = None
+
+def set_result_store(store):
+    """
+    Set the result store consulted by the functions of this library.
+
+    :param store: a :class:`ResultStore`, the name of a database file
+        to open as a :class:`ResultStore`, or None to stop storing
+        results
+    """
+    global _result_store
+    if isinstance(store, basestring):
+        store = ResultStore(store)
+    _result_store = store
+
+def get_result_store():
+    """
+    Return the result store set by :func:`set_result_store`, or None.
+    """
+    return _result_store
@@ -298,7 +298,22 @@ cpdef zero_forcing_set_bruteforce_cython_connected(graph, int upper_bound=-1):
     
     return False
 
-cpdef zero_forcing_set_bruteforce_cython(graph, upper_bound=-1):
+cpdef zero_forcing_set_bruteforce_cython(graph, upper_bound=-1, reduction=False):
+    if reduction:
+        # minrank is only needed here, so this module does not depend
+        # on it otherwise
+        from minrank import reduce_graph
+        reduced = reduce_graph(graph, parameter='Z')
+        if upper_bound != -1:
+            if upper_bound < reduced.offset:
+                return False
+            upper_bound -= reduced.offset
+        result = zero_forcing_set_bruteforce_cython(reduced.graph, upper_bound)
+        if result is False:
+            return False
+        size, zfs, saved_calculations, num_perms = result
+        zfs = reduced.lift_zero_forcing_set(zfs)
+        return len(zfs), zfs, saved_calculations, num_perms
     graph = graph.copy()
     relabeling = graph.relabel(return_map=True)
     labeling = dict([(v,k) for k,v in relabeling.iteritems()])
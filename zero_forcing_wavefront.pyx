@@ -80,7 +80,7 @@ cdef update_wavefront(bitset_s *neighbors,bitset_s *unfilled):
             
 from sage.graphs.all import Graph            
 
-def zero_forcing_set_wavefront(matrix):
+def zero_forcing_set_wavefront(matrix, reduction=False):
     """
     Calculate a zero forcing set.
 
@@ -88,6 +88,10 @@ def zero_forcing_set_wavefront(matrix):
 
     a graph or a matrix
 
+    If reduction is True, the input must be a graph.  The search then
+    runs on the graph shrunk by reduce_graph, and the set found is
+    lifted back with GraphReduction.lift_zero_forcing_set.
+
 
     OUTPUT:
 
@@ -97,7 +101,23 @@ def zero_forcing_set_wavefront(matrix):
     EXAMPLE::
         sage: zero_forcing_set(graphs.PetersenGraph().am())
         frozenset([8, 0, 4, 5, 6])
+        sage: zero_forcing_set_wavefront(graphs.StarGraph(6), reduction=True)[0]
+        5
     """
+    if reduction:
+        if not isinstance(matrix, Graph):
+            raise ValueError("reduction needs a graph, not a matrix")
+        # minrank is only needed here, so this module does not depend
+        # on it otherwise
+        from minrank import reduce_graph
+        reduced = reduce_graph(matrix, parameter='Z')
+        reduced_vertices = reduced.graph.vertices()
+        size, zfs, num_closures = zero_forcing_set_wavefront(reduced.graph)
+        zfs = reduced.lift_zero_forcing_set([reduced_vertices[i] for i in zfs])
+        # the vertices are returned as indices, as for the whole graph
+        index = dict((v, i) for i, v in enumerate(matrix.vertices()))
+        zfs = [index[v] for v in zfs]
+        return len(zfs), zfs, num_closures
     if isinstance(matrix, Graph):
         matrix = matrix.adjacency_matrix()
     cdef int n, i, j, v, budget, can_afford